@@ -4,26 +4,200 @@ Backup and Restore System for ADHD Support Vector Database
 Allows backing up and restoring all therapeutic knowledge and conversation data
 """
 
-import requests
-import json
+from http_session import PooledSessionClient, make_session
+import orjson
+import io
+import os
+import tarfile
+import time
 import zipfile
+import zlib
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import argparse
 
-class VectorBackupRestore:
+try:
+    import zstandard
+except ImportError:  # Only needed for .tar.zst backups
+    zstandard = None
+
+# Filesystem layout, resolved once at import
+_BASE = Path(__file__).resolve().parent
+_DATA_DIR = _BASE / "retriever" / "data"
+_CHROMA_DIR = _DATA_DIR / "chroma_db"
+_SEEDED_JSON = _DATA_DIR / "seeded_content.json"
+_BACKUP_DIR = _BASE / "backups"
+
+# Archive codec for backups; zipfile's zlib-backed DEFLATE. The archive sits
+# after the backup header below, so external unzip tools need to skip that prefix
+BACKUP_COMPRESSION = zipfile.ZIP_DEFLATED
+BACKUP_COMPRESSLEVEL = 1  # Chroma shards barely shrink past level 1
+
+# Files that are already compressed or near-random are stored as-is. HNSW
+# .bin segments are deliberately not listed: Chroma preallocates them and
+# they are mostly zeros, so they compress extremely well
+INCOMPRESSIBLE_SUFFIXES = {".parquet", ".sqlite3-wal"}
+COMPRESSIBILITY_PROBE_BYTES = 4096
+COMPRESSIBILITY_THRESHOLD = 0.95
+
+# Optional Zstandard-compressed tar format, selected with --format zstd
+ZSTD_LEVEL = 3
+BACKUP_SUFFIXES = {"zip": ".zip", "zstd": ".tar.zst"}
+# Backups are discovered with a plain str.endswith check rather than glob patterns
+BACKUP_SUFFIX_TUPLE = tuple(BACKUP_SUFFIXES.values())
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Every backup starts with a fixed-size JSON summary padded with spaces so
+# list_backups can read it without parsing the archive. Older backups start
+# directly with the archive magic bytes.
+BACKUP_HEADER_SIZE = 256
+BACKUP_HEADER_START = b"{"
+
+# Archive layout
+METADATA_ARCHIVE_NAME = "backup_metadata.json"
+SEEDED_CONTENT_ARCHIVE_NAME = "seeded_content.json"
+STORAGE_ARCHIVE_PREFIX = "chroma_db/"
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+RESTORE_WORKERS = os.cpu_count() or 1
+# Restores extract beside the live data under this suffix and swap in only on success
+RESTORE_STAGING_SUFFIX = ".restoring"
+
+def _compress_type_for(path) -> int:
+    """Pick ZIP_STORED for incompressible files, BACKUP_COMPRESSION otherwise"""
+    if os.path.splitext(path)[1] in INCOMPRESSIBLE_SUFFIXES:
+        return zipfile.ZIP_STORED
+    with open(path, 'rb') as f:
+        head = f.read(COMPRESSIBILITY_PROBE_BYTES)
+    if head and len(zlib.compress(head, 1)) / len(head) > COMPRESSIBILITY_THRESHOLD:
+        return zipfile.ZIP_STORED
+    return BACKUP_COMPRESSION
+
+def _iter_files(root):
+    """Yield a DirEntry for every file under root, reusing scandir's cached type info"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    yield entry
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("The zstandard package is required for .tar.zst backups (pip install zstandard)")
+
+def _encode_backup_header(metadata: Optional[Dict[str, Any]]) -> bytes:
+    """Build the fixed-size summary header written ahead of the archive"""
+    # With the service down there are no counts; flag the backup instead of claiming it is empty
+    summary = {"storage_only": True, "total_documents": None, "collections_count": None,
+               "created_at": datetime.now()}
+    if metadata is not None:
+        summary = {
+            "total_documents": metadata["total_documents"],
+            "collections_count": len(metadata["collections"]),
+            "created_at": metadata["backup_timestamp"]
+        }
+    header = orjson.dumps(summary)
+    if len(header) > BACKUP_HEADER_SIZE:
+        raise ValueError(f"Backup header exceeds {BACKUP_HEADER_SIZE} bytes")
+    return header.ljust(BACKUP_HEADER_SIZE)
+
+def _archive_offset(head: bytes) -> int:
+    """Where the archive itself starts, given the first bytes of a backup file"""
+    return BACKUP_HEADER_SIZE if head.startswith(BACKUP_HEADER_START) else 0
+
+def _read_backup_header(path) -> Optional[Dict[str, Any]]:
+    """Return the summary header, or None for backups written before headers existed"""
+    with open(path, 'rb') as f:
+        head = f.read(BACKUP_HEADER_SIZE)
+    if not _archive_offset(head):
+        return None
+    return orjson.loads(head.strip(b" \x00"))
+
+def _is_zstd_archive(path) -> bool:
+    """Sniff the archive format from its magic bytes"""
+    with open(path, 'rb') as f:
+        head = f.read(BACKUP_HEADER_SIZE + len(ZSTD_MAGIC))
+    offset = _archive_offset(head)
+    return head[offset:offset + len(ZSTD_MAGIC)] == ZSTD_MAGIC
+
+@contextmanager
+def _open_tar_zst(path):
+    """Open a .tar.zst backup as a streaming tar reader"""
+    _require_zstandard()
+    with open(path, 'rb') as raw:
+        raw.seek(_archive_offset(raw.read(len(BACKUP_HEADER_START))))
+        with zstandard.ZstdDecompressor().stream_reader(raw) as reader, \
+                tarfile.open(fileobj=reader, mode='r|') as tar:
+            yield tar
+
+def _iter_tar_zst_entries(path):
+    """Yield (name, fileobj) for every file in a .tar.zst backup, in archive order"""
+    with _open_tar_zst(path) as tar:
+        for member in tar:
+            if member.isfile():
+                yield member.name, tar.extractfile(member)
+
+def _read_backup_metadata(path) -> Optional[Dict[str, Any]]:
+    """Return a backup's metadata, or None if it was taken without a running service"""
+    if _is_zstd_archive(path):
+        # Metadata is always the first tar member, so only that one is checked
+        entries = _iter_tar_zst_entries(path)
+        try:
+            for name, f in entries:
+                return orjson.loads(f.read()) if name == METADATA_ARCHIVE_NAME else None
+        finally:
+            entries.close()
+        return None
+    
+    # zipfile locates the central directory from the end, so the header needs no seek
+    with zipfile.ZipFile(path, 'r') as zipf:
+        try:
+            return orjson.loads(zipf.read(METADATA_ARCHIVE_NAME))
+        except KeyError:
+            return None
+
+def _safe_target(dest_dir: Path, relative_name: str) -> str:
+    """Resolve an archive name under dest_dir, rejecting names that escape it"""
+    safe_name = os.path.normpath(relative_name)
+    if os.path.isabs(safe_name) or safe_name.split(os.sep)[0] == os.pardir:
+        raise ValueError(f"Unsafe path in backup archive: {relative_name}")
+    return os.path.join(dest_dir, safe_name)
+
+def _write_stream(src, target: str):
+    """Copy an open archive entry to target in fixed-size chunks"""
+    with open(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst, EXTRACT_CHUNK_SIZE)
+
+def _extract_entry(src, dest_dir: Path, relative_name: str):
+    """Stream one archive entry to dest_dir/relative_name without a staging dir"""
+    target = _safe_target(dest_dir, relative_name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    _write_stream(src, target)
+
+def _extract_zip_member(zipf: zipfile.ZipFile, info: zipfile.ZipInfo, target: str):
+    """Inflate one zip member; safe to run from worker threads sharing zipf"""
+    with zipf.open(info) as src:
+        _write_stream(src, target)
+
+class VectorBackupRestore(PooledSessionClient):
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
-        self.backup_dir = Path(__file__).parent / "backups"
+        self.backup_dir = _BACKUP_DIR
         self.backup_dir.mkdir(exist_ok=True)
-        self.data_dir = Path(__file__).parent / "retriever" / "data" / "chroma_db"
+        self.index_file = self.backup_dir / ".index.json"
+        self.data_dir = _CHROMA_DIR
+        self.session = make_session()
     
     def check_service_health(self) -> bool:
         """Check if the vector service is running"""
         try:
-            response = requests.get(f"{self.base_url}/health")
+            response = self.session.get(f"{self.base_url}/health")
             return response.status_code == 200
         except:
             return False
@@ -31,7 +205,7 @@ class VectorBackupRestore:
     def get_all_collections(self) -> List[Dict[str, Any]]:
         """Get information about all collections"""
         try:
-            response = requests.get(f"{self.base_url}/collections")
+            response = self.session.get(f"{self.base_url}/collections")
             if response.status_code == 200:
                 return response.json().get("collections", [])
         except Exception as e:
@@ -44,7 +218,7 @@ class VectorBackupRestore:
         
         collections = self.get_all_collections()
         backup_metadata = {
-            "backup_timestamp": datetime.now().isoformat(),
+            "backup_timestamp": datetime.now(),  # orjson writes ISO 8601
             "service_url": self.base_url,
             "collections": collections,
             "total_documents": sum(c["count"] for c in collections)
@@ -53,13 +227,63 @@ class VectorBackupRestore:
         print(f"   Found {len(collections)} collections with {backup_metadata['total_documents']} total documents")
         return backup_metadata
     
-    def create_backup(self, backup_name: str = None) -> Path:
+    def _iter_storage_files(self):
+        """Yield (path, arcname) for every file in the persistent storage directory"""
+        root = str(self.data_dir)
+        for entry in _iter_files(root):
+            yield entry.path, STORAGE_ARCHIVE_PREFIX + entry.path[len(root) + 1:]
+    
+    def _write_zip_backup(self, backup_path: Path, metadata: Optional[Dict[str, Any]]):
+        """Write the backup as a DEFLATE zip archive"""
+        with open(backup_path, 'wb') as raw:
+            raw.write(_encode_backup_header(metadata))
+            self._write_zip_entries(raw, metadata)
+    
+    def _write_zip_entries(self, raw, metadata: Optional[Dict[str, Any]]):
+        """Write the zip archive into an already-open file after the header"""
+        with zipfile.ZipFile(raw, 'w', BACKUP_COMPRESSION,
+                             compresslevel=BACKUP_COMPRESSLEVEL) as zipf:
+            if metadata is not None:
+                # Tiny entry: stored raw so reading it back skips inflate entirely
+                zipf.writestr(METADATA_ARCHIVE_NAME, orjson.dumps(metadata, option=orjson.OPT_INDENT_2),
+                              compress_type=zipfile.ZIP_STORED)
+            if self.data_dir.exists():
+                for path, arcname in self._iter_storage_files():
+                    zipf.write(path, arcname, compress_type=_compress_type_for(path))
+            if _SEEDED_JSON.exists():
+                zipf.write(_SEEDED_JSON, SEEDED_CONTENT_ARCHIVE_NAME)
+    
+    def _write_tar_zst_backup(self, backup_path: Path, metadata: Optional[Dict[str, Any]]):
+        """Write the backup as a multi-threaded Zstandard-compressed tar stream"""
+        _require_zstandard()
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+        with open(backup_path, 'wb') as raw:
+            raw.write(_encode_backup_header(metadata))
+            with compressor.stream_writer(raw) as compressed, \
+                    tarfile.open(fileobj=compressed, mode='w|') as tar:
+                self._write_tar_entries(tar, metadata)
+    
+    def _write_tar_entries(self, tar: tarfile.TarFile, metadata: Optional[Dict[str, Any]]):
+        """Add the metadata and storage files to an open tar stream"""
+        # Metadata goes first so list_backups can stop after one member
+        if metadata is not None:
+            data = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+            info = tarfile.TarInfo(METADATA_ARCHIVE_NAME)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+        if self.data_dir.exists():
+            for path, arcname in self._iter_storage_files():
+                tar.add(path, arcname, recursive=False)
+        if _SEEDED_JSON.exists():
+            tar.add(_SEEDED_JSON, SEEDED_CONTENT_ARCHIVE_NAME)
+    
+    def create_backup(self, backup_name: str = None, archive_format: str = "zip") -> Path:
         """Create a complete backup of the vector database"""
         if not backup_name:
             backup_name = f"adhd_support_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        backup_path = self.backup_dir / f"{backup_name}.zip"
-        temp_backup_dir = self.backup_dir / "temp_backup"
+        backup_path = self.backup_dir / f"{backup_name}{BACKUP_SUFFIXES[archive_format]}"
         
         print(f"🗃️  Creating backup: {backup_name}")
         print("=" * 50)
@@ -72,40 +296,25 @@ class VectorBackupRestore:
             print("⚠️  Service not running - backing up storage files only")
         
         try:
-            # Create temporary backup directory
-            temp_backup_dir.mkdir(exist_ok=True)
-            
             # Backup collection metadata if service is running
-            if service_running:
-                metadata = self.backup_collections_metadata()
-                with open(temp_backup_dir / "backup_metadata.json", 'w') as f:
-                    json.dump(metadata, f, indent=2)
+            metadata = self.backup_collections_metadata() if service_running else None
             
-            # Backup persistent storage directory
             if self.data_dir.exists():
                 print("💾 Backing up persistent storage...")
-                storage_backup_dir = temp_backup_dir / "chroma_db"
-                shutil.copytree(self.data_dir, storage_backup_dir)
-                print(f"   Storage backed up: {self.data_dir}")
             else:
                 print("⚠️  No persistent storage found")
             
-            # Backup seeded content record
-            seeded_content_file = Path(__file__).parent / "retriever" / "data" / "seeded_content.json"
-            if seeded_content_file.exists():
-                shutil.copy2(seeded_content_file, temp_backup_dir / "seeded_content.json")
-                print("📝 Backed up seeded content record")
-            
-            # Create zip archive
+            # Write everything straight into the archive, no staging copy
             print("🗜️  Creating compressed backup...")
-            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in temp_backup_dir.rglob('*'):
-                    if file_path.is_file():
-                        arcname = file_path.relative_to(temp_backup_dir)
-                        zipf.write(file_path, arcname)
+            if archive_format == "zstd":
+                self._write_tar_zst_backup(backup_path, metadata)
+            else:
+                self._write_zip_backup(backup_path, metadata)
             
-            # Clean up temp directory
-            shutil.rmtree(temp_backup_dir)
+            if self.data_dir.exists():
+                print(f"   Storage backed up: {self.data_dir}")
+            if _SEEDED_JSON.exists():
+                print("📝 Backed up seeded content record")
             
             # Show backup info
             backup_size = backup_path.stat().st_size / (1024 * 1024)  # MB
@@ -118,15 +327,51 @@ class VectorBackupRestore:
         except Exception as e:
             print(f"❌ Backup failed: {e}")
             # Clean up on failure
-            if temp_backup_dir.exists():
-                shutil.rmtree(temp_backup_dir)
             if backup_path.exists():
                 backup_path.unlink()
             raise
     
+    def _load_backup_index(self) -> Dict[str, Any]:
+        """Load cached per-backup metadata summaries"""
+        try:
+            with open(self.index_file, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_backup_index(self, index: Dict[str, Any]):
+        """Persist cached per-backup metadata summaries"""
+        try:
+            with open(self.index_file, 'wb') as f:
+                f.write(orjson.dumps(index, option=orjson.OPT_INDENT_2))
+        except OSError as e:
+            print(f"Warning: Could not save backup index: {e}")
+    
+    def _read_backup_summary(self, backup_path: str) -> Dict[str, Any]:
+        """Read collection/document counts from a backup's header or metadata entry"""
+        header = _read_backup_header(backup_path)
+        if header is not None:
+            return {
+                "legacy": False,
+                "storage_only": header.get("collections_count") is None,
+                "collections_count": header.get("collections_count"),
+                "total_documents": header.get("total_documents")
+            }
+        metadata = _read_backup_metadata(backup_path)
+        if metadata is None:
+            return {"legacy": True}
+        return {
+            "legacy": False,
+            "collections_count": len(metadata.get('collections', [])),
+            "total_documents": metadata.get('total_documents', 'Unknown')
+        }
+    
     def list_backups(self):
         """List all available backups"""
-        backups = list(self.backup_dir.glob("*.zip"))
+        # One stat per backup, reused for sorting, display and the index check
+        with os.scandir(self.backup_dir) as it:
+            backups = [(entry, entry.stat()) for entry in it
+                       if entry.name.endswith(BACKUP_SUFFIX_TUPLE) and entry.is_file()]
         
         if not backups:
             print("📂 No backups found")
@@ -135,40 +380,171 @@ class VectorBackupRestore:
         print("📂 Available backups:")
         print("-" * 80)
         
-        for backup in sorted(backups, key=lambda x: x.stat().st_mtime, reverse=True):
-            size_mb = backup.stat().st_size / (1024 * 1024)
-            modified = datetime.fromtimestamp(backup.stat().st_mtime)
+        # Metadata is cached by (name, mtime, size) so unchanged archives aren't reopened
+        index = self._load_backup_index()
+        updated_index = {}
+        
+        backups.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        for backup, stat in backups:
+            size_mb = stat.st_size / (1024 * 1024)
+            modified = datetime.fromtimestamp(stat.st_mtime)
             
-            # Try to read metadata from backup
-            try:
-                with zipfile.ZipFile(backup, 'r') as zipf:
-                    if 'backup_metadata.json' in zipf.namelist():
-                        metadata = json.loads(zipf.read('backup_metadata.json'))
-                        doc_count = metadata.get('total_documents', 'Unknown')
-                        collection_count = len(metadata.get('collections', []))
-                        print(f"📦 {backup.name}")
-                        print(f"   📅 Created: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
-                        print(f"   📏 Size: {size_mb:.2f} MB")
-                        print(f"   📊 Collections: {collection_count}, Documents: {doc_count}")
-                    else:
-                        print(f"📦 {backup.name} (Legacy backup)")
-                        print(f"   📅 Created: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
-                        print(f"   📏 Size: {size_mb:.2f} MB")
-            except Exception as e:
+            cached = index.get(backup.name)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                summary = cached["summary"]
+            else:
+                # Try to read metadata from backup
+                try:
+                    summary = self._read_backup_summary(backup.path)
+                except Exception:
+                    summary = None
+            
+            if summary is not None:
+                updated_index[backup.name] = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "summary": summary
+                }
+            
+            if summary is None:
                 print(f"📦 {backup.name} (Metadata read error)")
                 print(f"   📅 Created: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
                 print(f"   📏 Size: {size_mb:.2f} MB")
+            elif summary["legacy"]:
+                print(f"📦 {backup.name} (Legacy backup)")
+                print(f"   📅 Created: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"   📏 Size: {size_mb:.2f} MB")
+            else:
+                print(f"📦 {backup.name}")
+                print(f"   📅 Created: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"   📏 Size: {size_mb:.2f} MB")
+                if summary.get("storage_only"):
+                    print("   📊 Documents: unknown (service unavailable at backup time)")
+                else:
+                    print(f"   📊 Collections: {summary['collections_count']}, Documents: {summary['total_documents']}")
             
             print()
+        
+        if updated_index != index:
+            self._save_backup_index(updated_index)
+    
+    def _print_backup_metadata(self, metadata: Dict[str, Any]):
+        print(f"📊 Backup contains {len(metadata['collections'])} collections")
+        print(f"   Total documents: {metadata['total_documents']}")
+        print(f"   Created: {metadata['backup_timestamp']}")
+    
+    def _begin_restore(self) -> Path:
+        """Create an empty staging dir beside the live storage, on the same filesystem"""
+        print("💾 Restoring persistent storage...")
+        staging = self.data_dir.with_name(self.data_dir.name + RESTORE_STAGING_SUFFIX)
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        return staging
+    
+    def _commit_restore(self, staging: Path, seeded_staging: Optional[Path]):
+        """Swap fully extracted data into place; the live tree is untouched until now"""
+        if not any(staging.iterdir()):
+            # Backup carried no storage files; keep the live data as it is
+            staging.rmdir()
+        else:
+            # Backup current data if it exists (same directory, so a metadata-only rename)
+            backup_current = None
+            if self.data_dir.exists():
+                backup_current = self.data_dir.parent / f"chroma_db_backup_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+                os.replace(self.data_dir, backup_current)
+            try:
+                os.replace(staging, self.data_dir)
+            except OSError:
+                if backup_current is not None:
+                    os.replace(backup_current, self.data_dir)
+                raise
+            if backup_current is not None:
+                print(f"   Current data backed up to: {backup_current}")
+            print("   ✅ Persistent storage restored")
+        if seeded_staging is not None:
+            os.replace(seeded_staging, _SEEDED_JSON)
+            print("   ✅ Seeded content record restored")
+    
+    def _restore_staged(self, extract):
+        """Run extract(staging, seeded_staging) and swap its output in only if it finishes"""
+        staging = self._begin_restore()
+        seeded_staging = _SEEDED_JSON.with_name(_SEEDED_JSON.name + RESTORE_STAGING_SUFFIX)
+        try:
+            restored_seeded = extract(staging, seeded_staging)
+            self._commit_restore(staging, seeded_staging if restored_seeded else None)
+        finally:
+            # No-ops after a successful swap; clear leftovers from a failed one
+            shutil.rmtree(staging, ignore_errors=True)
+            seeded_staging.unlink(missing_ok=True)
+    
+    def _restore_from_zip(self, backup_path: Path):
+        """Restore a zip backup, inflating storage entries across a thread pool"""
+        with zipfile.ZipFile(backup_path, 'r') as zipf:
+            # Read backup metadata
+            try:
+                self._print_backup_metadata(orjson.loads(zipf.read(METADATA_ARCHIVE_NAME)))
+            except KeyError:
+                pass
+            
+            def extract(staging: Path, seeded_staging: Path) -> bool:
+                storage_entries = [
+                    (info, _safe_target(staging, info.filename[len(STORAGE_ARCHIVE_PREFIX):]))
+                    for info in zipf.infolist()
+                    if info.filename.startswith(STORAGE_ARCHIVE_PREFIX) and not info.is_dir()
+                ]
+                
+                # Create directories up front so workers never race on mkdir
+                for parent in sorted({os.path.dirname(target) for _, target in storage_entries}):
+                    os.makedirs(parent, exist_ok=True)
+                
+                # Each member is an independent DEFLATE stream and zlib releases the GIL
+                with ThreadPoolExecutor(max_workers=RESTORE_WORKERS) as executor:
+                    futures = [
+                        executor.submit(_extract_zip_member, zipf, info, target)
+                        for info, target in storage_entries
+                    ]
+                    for future in as_completed(futures):
+                        future.result()
+                
+                # Restore seeded content record
+                try:
+                    seeded_info = zipf.getinfo(SEEDED_CONTENT_ARCHIVE_NAME)
+                except KeyError:
+                    return False
+                _extract_zip_member(zipf, seeded_info, str(seeded_staging))
+                return True
+            
+            self._restore_staged(extract)
+    
+    def _restore_from_tar_zst(self, backup_path: Path):
+        """Restore a .tar.zst backup in a single streaming pass"""
+        def extract(staging: Path, seeded_staging: Path) -> bool:
+            restored_seeded = False
+            for name, src in _iter_tar_zst_entries(backup_path):
+                if name == METADATA_ARCHIVE_NAME:
+                    self._print_backup_metadata(orjson.loads(src.read()))
+                
+                elif name.startswith(STORAGE_ARCHIVE_PREFIX):
+                    _extract_entry(src, staging, name[len(STORAGE_ARCHIVE_PREFIX):])
+                
+                elif name == SEEDED_CONTENT_ARCHIVE_NAME:
+                    _write_stream(src, str(seeded_staging))
+                    restored_seeded = True
+            return restored_seeded
+        
+        self._restore_staged(extract)
     
     def restore_backup(self, backup_name: str):
         """Restore from a backup"""
         # Find backup file
         backup_path = None
-        if backup_name.endswith('.zip'):
+        if backup_name.endswith(BACKUP_SUFFIX_TUPLE):
             backup_path = self.backup_dir / backup_name
         else:
-            backup_path = self.backup_dir / f"{backup_name}.zip"
+            for suffix in BACKUP_SUFFIX_TUPLE:
+                backup_path = self.backup_dir / f"{backup_name}{suffix}"
+                if backup_path.exists():
+                    break
         
         if not backup_path.exists():
             print(f"❌ Backup not found: {backup_path}")
@@ -187,48 +563,11 @@ class VectorBackupRestore:
                 return False
         
         try:
-            temp_restore_dir = self.backup_dir / "temp_restore"
-            temp_restore_dir.mkdir(exist_ok=True)
-            
-            # Extract backup
             print("📦 Extracting backup...")
-            with zipfile.ZipFile(backup_path, 'r') as zipf:
-                zipf.extractall(temp_restore_dir)
-            
-            # Read backup metadata
-            metadata_file = temp_restore_dir / "backup_metadata.json"
-            if metadata_file.exists():
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                print(f"📊 Backup contains {len(metadata['collections'])} collections")
-                print(f"   Total documents: {metadata['total_documents']}")
-                print(f"   Created: {metadata['backup_timestamp']}")
-            
-            # Restore persistent storage
-            storage_backup = temp_restore_dir / "chroma_db"
-            if storage_backup.exists():
-                print("💾 Restoring persistent storage...")
-                
-                # Backup current data if it exists
-                if self.data_dir.exists():
-                    backup_current = self.data_dir.parent / f"chroma_db_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    shutil.move(self.data_dir, backup_current)
-                    print(f"   Current data backed up to: {backup_current}")
-                
-                # Restore from backup
-                shutil.copytree(storage_backup, self.data_dir)
-                print("   ✅ Persistent storage restored")
-            
-            # Restore seeded content record
-            seeded_content_backup = temp_restore_dir / "seeded_content.json"
-            if seeded_content_backup.exists():
-                seeded_content_target = Path(__file__).parent / "retriever" / "data" / "seeded_content.json"
-                seeded_content_target.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(seeded_content_backup, seeded_content_target)
-                print("   ✅ Seeded content record restored")
-            
-            # Clean up
-            shutil.rmtree(temp_restore_dir)
+            if _is_zstd_archive(backup_path):
+                self._restore_from_tar_zst(backup_path)
+            else:
+                self._restore_from_zip(backup_path)
             
             print(f"\n🎉 Restore completed successfully!")
             print("   Start the vector service to use the restored data.")
@@ -237,29 +576,32 @@ class VectorBackupRestore:
             
         except Exception as e:
             print(f"❌ Restore failed: {e}")
-            if temp_restore_dir.exists():
-                shutil.rmtree(temp_restore_dir)
             return False
 
 def main():
-    parser = argparse.ArgumentParser(description="Backup and restore ADHD Support vector database")
+    parser = argparse.ArgumentParser(
+        description="Backup and restore ADHD Support vector database",
+        epilog=f"Backups start with a {BACKUP_HEADER_SIZE}-byte JSON header before the zip or "
+               "tar.zst data; restore them with this script rather than a plain unzip/tar."
+    )
     parser.add_argument("action", choices=["backup", "restore", "list"], 
                        help="Action to perform")
     parser.add_argument("--name", help="Backup name for backup/restore operations")
+    parser.add_argument("--format", choices=sorted(BACKUP_SUFFIXES), default="zip",
+                       help="Archive format for new backups (zstd requires the zstandard package)")
     
     args = parser.parse_args()
     
-    backup_restore = VectorBackupRestore()
-    
-    if args.action == "backup":
-        backup_restore.create_backup(args.name)
-    elif args.action == "restore":
-        if not args.name:
-            print("❌ Please provide a backup name with --name")
-            return
-        backup_restore.restore_backup(args.name)
-    elif args.action == "list":
-        backup_restore.list_backups()
+    with VectorBackupRestore() as backup_restore:
+        if args.action == "backup":
+            backup_restore.create_backup(args.name, args.format)
+        elif args.action == "restore":
+            if not args.name:
+                print("❌ Please provide a backup name with --name")
+                return
+            backup_restore.restore_backup(args.name)
+        elif args.action == "list":
+            backup_restore.list_backups()
 
 if __name__ == "__main__":
     main()
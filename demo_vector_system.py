@@ -4,20 +4,22 @@ ADHD Support Vector System Demo
 Interactive demonstration of the vector-enhanced contextual intelligence
 """
 
-import requests
+from http_session import PooledSessionClient, make_session
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 
-class VectorSystemDemo:
+class VectorSystemDemo(PooledSessionClient):
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
         self.session_id = "demo-session-001"
+        self.session = make_session()
     
     def check_service_health(self) -> bool:
         """Check if the vector service is running"""
         try:
-            response = requests.get(f"{self.base_url}/health")
+            response = self.session.get(f"{self.base_url}/health")
             return response.status_code == 200
         except:
             return False
@@ -25,7 +27,7 @@ class VectorSystemDemo:
     def get_collections_info(self) -> Dict[str, Any]:
         """Get information about available collections"""
         try:
-            response = requests.get(f"{self.base_url}/collections")
+            response = self.session.get(f"{self.base_url}/collections")
             return response.json() if response.status_code == 200 else {}
         except:
             return {}
@@ -43,7 +45,7 @@ class VectorSystemDemo:
         }
         
         try:
-            response = requests.post(f"{self.base_url}/store_conversation", json=conversation_data)
+            response = self.session.post(f"{self.base_url}/store_conversation", json=conversation_data)
             return {"success": response.status_code == 200, "data": conversation_data}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -57,7 +59,7 @@ class VectorSystemDemo:
         }
         
         try:
-            response = requests.post(f"{self.base_url}/retrieve_adhd_context", json=request_data)
+            response = self.session.post(f"{self.base_url}/retrieve_adhd_context", json=request_data)
             return response.json() if response.status_code == 200 else {"error": response.text}
         except Exception as e:
             return {"error": str(e)}
@@ -75,7 +77,7 @@ class VectorSystemDemo:
             request_data["filters"] = filters
         
         try:
-            response = requests.post(f"{self.base_url}/retrieve", json=request_data)
+            response = self.session.post(f"{self.base_url}/retrieve", json=request_data)
             return response.json() if response.status_code == 200 else {"error": response.text}
         except Exception as e:
             return {"error": str(e)}
@@ -112,14 +114,19 @@ class VectorSystemDemo:
             {"message": "ok", "context": {"crisis_level": "moderate", "attention_status": "fading"}}
         ]
         
-        for i, conv in enumerate(conversations, 1):
+        # Store all turns concurrently over the shared session
+        with ThreadPoolExecutor(max_workers=len(conversations)) as executor:
+            results = list(executor.map(
+                lambda conv: self.simulate_conversation_turn(conv["message"], conv["context"]),
+                conversations
+            ))
+        
+        for i, (conv, result) in enumerate(zip(conversations, results), 1):
             print(f"   Turn {i}: Storing '{conv['message']}'")
-            result = self.simulate_conversation_turn(conv["message"], conv["context"])
             if result["success"]:
                 print(f"      ✅ Stored with context: {conv['context']}")
             else:
                 print(f"      ❌ Failed: {result.get('error', 'Unknown error')}")
-            time.sleep(0.5)  # Brief pause for demonstration
         
         # Test contextual retrieval
         print("\n4. 🎯 Testing Contextual Retrieval:")
@@ -210,8 +217,8 @@ class VectorSystemDemo:
 
 def main():
     """Main demo function"""
-    demo = VectorSystemDemo()
-    demo.run_demo()
+    with VectorSystemDemo() as demo:
+        demo.run_demo()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Session Setup
+Pooled requests sessions and seeding settings for the scripts that talk to the vector service
+"""
+
+import hashlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds, so a stalled service fails fast instead of hanging the seeder
+REQUEST_TIMEOUT = (3, 30)
+HEALTH_TIMEOUT = 2
+
+# Request bodies are pre-encoded with orjson and sent as bytes
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Adds carry content-derived ids and upsert, so POSTs are safe to retry on gateway errors
+SEED_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[502, 503, 504],
+    allowed_methods=frozenset({"GET", "HEAD", "POST"})
+)
+
+# Documents per /add_context request; Chroma ingests best in batches of roughly 50-250
+SEED_BATCH_SIZE = 128
+
+def content_digest(doc: str) -> str:
+    """Stable short digest identifying a seeded document"""
+    return hashlib.blake2b(doc.encode(), digest_size=8).hexdigest()
+
+def make_session(retry=0) -> requests.Session:
+    """Create a keep-alive session; retry is passed through as the adapter's max_retries"""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=retry
+    ))
+    return session
+
+class PooledSessionClient:
+    """Mixin for clients holding a make_session() session in self.session"""
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
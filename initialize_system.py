@@ -4,22 +4,42 @@ Complete ADHD Support System Initialization
 Sets up the persistent ChromaDB with all therapeutic knowledge and conversation guides
 """
 
+import asyncio
+import os
 import subprocess
 import sys
 import time
-import requests
+from collections import deque
+from http_session import PooledSessionClient, make_session
 from pathlib import Path
 
-class SystemInitializer:
+PARALLEL_SEED = os.getenv("PARALLEL_SEED", "1") != "0"
+
+# Output lines worth echoing from each seed script
+THERAPEUTIC_SEED_MARKERS = ('✅ Added', '📊')
+GUIDE_SEED_MARKERS = ('✅ Added', '💡')
+
+# Total time to wait for /health after starting the service, and how often to report progress
+SERVICE_WAIT_TIMEOUT = 30
+SERVICE_WAIT_PROGRESS = 5
+
+# Lines of child output kept for printing when a helper script fails
+OUTPUT_TAIL_LINES = 50
+
+# Child scripts flush each line so their progress can be streamed
+UNBUFFERED_CHILD_ENV = {**os.environ, "PYTHONUNBUFFERED": "1"}
+
+class SystemInitializer(PooledSessionClient):
     def __init__(self):
         self.base_url = "http://localhost:8000"
         self.data_dir = Path(__file__).parent / "retriever" / "data" / "chroma_db"
         self.service_process = None
+        self.session = make_session()
     
     def check_service_health(self) -> bool:
         """Check if the vector service is running"""
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=2)
+            response = self.session.get(f"{self.base_url}/health", timeout=2)
             return response.status_code == 200
         except:
             return False
@@ -41,38 +61,67 @@ class SystemInitializer:
             print(f"   ❌ Error starting service: {e}")
             return False
     
-    def wait_for_service(self, max_attempts: int = 30) -> bool:
+    def wait_for_service(self, timeout: float = SERVICE_WAIT_TIMEOUT) -> bool:
         """Wait for the service to be ready"""
         print("⏳ Waiting for service to be ready...")
         
-        for attempt in range(max_attempts):
+        # Poll quickly at first, backing off towards 1s between checks, until the deadline
+        start = time.monotonic()
+        deadline = start + timeout
+        next_progress = start + SERVICE_WAIT_PROGRESS
+        delay = 0.05
+        while True:
             if self.check_service_health():
                 print("✅ Service is ready!")
                 return True
-            time.sleep(1)
-            if attempt % 5 == 0:
-                print(f"   Attempt {attempt + 1}/{max_attempts}...")
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now >= next_progress:
+                print(f"   Still waiting ({now - start:.0f}s/{timeout:.0f}s)...")
+                next_progress += SERVICE_WAIT_PROGRESS
+            time.sleep(min(delay, deadline - now))
+            delay = min(delay * 1.5, 1.0)
         
         print("❌ Service failed to start within timeout")
         return False
     
+    def _run_streaming(self, args, markers, first_match_only: bool = False):
+        """Run a helper script, echoing matching output lines as they arrive
+        
+        Only a bounded tail of the output is kept, for the warnings path.
+        """
+        process = subprocess.Popen([sys.executable, *args], stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1,
+                                   env=UNBUFFERED_CHILD_ENV)
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        matched = False
+        for line in process.stdout:
+            tail.append(line)
+            if any(marker in line for marker in markers) and not (first_match_only and matched):
+                print(f"   {line}", end='')
+                matched = True
+        return process.wait(), ''.join(tail)
+    
+    def _report_seed_result(self, returncode: int, output_tail: str, success_message: str,
+                            warning_message: str):
+        """Print the outcome of a finished seed script"""
+        if returncode == 0:
+            print(success_message)
+        else:
+            print(warning_message)
+            print(output_tail)
+    
     def seed_therapeutic_knowledge(self):
         """Seed the basic therapeutic knowledge"""
         print("\n🧠 Seeding therapeutic knowledge...")
         
         try:
-            result = subprocess.run([sys.executable, "seed_therapeutic_knowledge.py"], 
-                                  capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print("✅ Therapeutic knowledge seeded")
-                # Print summary lines
-                for line in result.stdout.split('\n'):
-                    if '✅ Added' in line or '📊' in line:
-                        print(f"   {line}")
-            else:
-                print(f"⚠️  Therapeutic seeding completed with warnings")
-                print(result.stdout)
+            returncode, output_tail = self._run_streaming(["seed_therapeutic_knowledge.py"],
+                                                          THERAPEUTIC_SEED_MARKERS)
+            self._report_seed_result(returncode, output_tail,
+                                     "✅ Therapeutic knowledge seeded",
+                                     "⚠️  Therapeutic seeding completed with warnings")
                 
         except Exception as e:
             print(f"❌ Error seeding therapeutic knowledge: {e}")
@@ -82,29 +131,47 @@ class SystemInitializer:
         print("\n💬 Seeding conversation management guide...")
         
         try:
-            result = subprocess.run([sys.executable, "seed_conversation_guide.py"], 
-                                  capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print("✅ Conversation guide seeded")
-                # Print summary lines
-                for line in result.stdout.split('\n'):
-                    if '✅ Added' in line or '💡' in line:
-                        print(f"   {line}")
-            else:
-                print(f"⚠️  Conversation guide seeding completed with warnings")
-                print(result.stdout)
+            returncode, output_tail = self._run_streaming(["seed_conversation_guide.py"],
+                                                          GUIDE_SEED_MARKERS)
+            self._report_seed_result(returncode, output_tail,
+                                     "✅ Conversation guide seeded",
+                                     "⚠️  Conversation guide seeding completed with warnings")
                 
         except Exception as e:
             print(f"❌ Error seeding conversation guide: {e}")
     
+    async def _seed_parallel(self):
+        """Seed therapeutic knowledge and the conversation guide concurrently"""
+        print("\n🧠 Seeding therapeutic knowledge and 💬 conversation guide in parallel...")
+        
+        # Each script streams through the same helper as the sequential path, on its own thread
+        therapeutic, guide = await asyncio.gather(
+            asyncio.to_thread(self._run_streaming, ["seed_therapeutic_knowledge.py"], THERAPEUTIC_SEED_MARKERS),
+            asyncio.to_thread(self._run_streaming, ["seed_conversation_guide.py"], GUIDE_SEED_MARKERS),
+            return_exceptions=True
+        )
+        
+        if isinstance(therapeutic, Exception):
+            print(f"❌ Error seeding therapeutic knowledge: {therapeutic}")
+        else:
+            self._report_seed_result(*therapeutic,
+                                     "✅ Therapeutic knowledge seeded",
+                                     "⚠️  Therapeutic seeding completed with warnings")
+        
+        if isinstance(guide, Exception):
+            print(f"❌ Error seeding conversation guide: {guide}")
+        else:
+            self._report_seed_result(*guide,
+                                     "✅ Conversation guide seeded",
+                                     "⚠️  Conversation guide seeding completed with warnings")
+    
     def get_system_status(self):
         """Get the current system status"""
         print("\n📊 System Status:")
         
         try:
             # Get health status
-            health_response = requests.get(f"{self.base_url}/health", timeout=5)
+            health_response = self.session.get(f"{self.base_url}/health", timeout=5)
             if health_response.status_code == 200:
                 health_data = health_response.json()
                 print(f"   🟢 Service: {health_data.get('status', 'unknown')}")
@@ -112,7 +179,7 @@ class SystemInitializer:
                 print(f"   📁 Storage exists: {health_data.get('storage_exists', False)}")
             
             # Get collections info
-            collections_response = requests.get(f"{self.base_url}/collections", timeout=5)
+            collections_response = self.session.get(f"{self.base_url}/collections", timeout=5)
             if collections_response.status_code == 200:
                 collections_data = collections_response.json()
                 collections = collections_data.get("collections", [])
@@ -134,21 +201,17 @@ class SystemInitializer:
         print("\n💾 Creating initial system backup...")
         
         try:
-            result = subprocess.run([
-                sys.executable, "backup_restore_data.py", "backup", 
-                "--name", "initial_system_setup"
-            ], capture_output=True, text=True)
+            # Echo the backup location as it is printed
+            returncode, output_tail = self._run_streaming(
+                ["backup_restore_data.py", "backup", "--name", "initial_system_setup"],
+                ('📁 Location:',), first_match_only=True
+            )
             
-            if result.returncode == 0:
+            if returncode == 0:
                 print("✅ Initial backup created")
-                # Print backup location
-                for line in result.stdout.split('\n'):
-                    if '📁 Location:' in line:
-                        print(f"   {line}")
-                        break
             else:
                 print("⚠️  Backup creation had warnings")
-                print(result.stdout)
+                print(output_tail)
                 
         except Exception as e:
             print(f"❌ Error creating backup: {e}")
@@ -172,11 +235,14 @@ class SystemInitializer:
                 print("   Please ensure the service is running before continuing")
                 return False
         
-        # Step 2: Seed therapeutic knowledge
-        self.seed_therapeutic_knowledge()
-        
-        # Step 3: Seed conversation guide
-        self.seed_conversation_guide()
+        # Steps 2 & 3: Seed therapeutic knowledge and conversation guide.
+        # The two scripts are independent; set PARALLEL_SEED=0 to run them
+        # one after the other if the server serializes writes anyway.
+        if PARALLEL_SEED:
+            asyncio.run(self._seed_parallel())
+        else:
+            self.seed_therapeutic_knowledge()
+            self.seed_conversation_guide()
         
         # Step 4: Get system status
         self.get_system_status()
@@ -209,8 +275,8 @@ class SystemInitializer:
         return True
 
 def main():
-    initializer = SystemInitializer()
-    initializer.initialize_complete_system()
+    with SystemInitializer() as initializer:
+        initializer.initialize_complete_system()
 
 if __name__ == "__main__":
     main()
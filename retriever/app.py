@@ -3,23 +3,36 @@ Helen AI - Vector Retrieval Service
 FastAPI service for semantic search and contextual memory using ChromaDB
 """
 
-from fastapi import FastAPI, HTTPException, Request, Header, Depends
+from fastapi import FastAPI, HTTPException, Request, Header, Depends, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import chromadb
+import numpy as np
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
+import asyncio
 import json
+import logging
 import os
+import re
 from datetime import datetime
 import uuid
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 import stripe
-from supabase import create_client, Client
-from functools import lru_cache
-from jose import jwt
+from supabase import create_client, acreate_client, Client, AClient
+from jose import jwt, jwk
 import requests
 
-app = FastAPI(title="Helen Vector Retrieval Service", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Helen Vector Retrieval Service", version="1.0.0",
+              default_response_class=ORJSONResponse)
 
 # Set up persistent storage directory with absolute path
 DATA_DIR = Path(__file__).parent / "data" / "chroma_db"
@@ -36,6 +49,24 @@ chroma_client = chromadb.PersistentClient(
     )
 )
 
+# Every collection uses this one embedding function, so a query can be embedded
+# once and the vector reused across collections
+EMBED_FN = embedding_functions.DefaultEmbeddingFunction()
+
+# Collection handles resolved once and reused, skipping the metadata lookup per request
+COLLECTIONS: Dict[str, Any] = {}
+
+def get_collection_handle(name: str, create: bool = False):
+    """Return a cached collection handle, resolving it from ChromaDB on first use"""
+    collection = COLLECTIONS.get(name)
+    if collection is None:
+        if create:
+            collection = chroma_client.get_or_create_collection(name=name, embedding_function=EMBED_FN)
+        else:
+            collection = chroma_client.get_collection(name=name, embedding_function=EMBED_FN)
+        COLLECTIONS[name] = collection
+    return collection
+
 # Pydantic models for API
 class QueryRequest(BaseModel):
     query_text: str
@@ -93,13 +124,15 @@ async def startup_event():
         try:
             collection = chroma_client.get_or_create_collection(
                 name=name,
-                metadata=config["metadata"]
+                metadata=config["metadata"],
+                embedding_function=EMBED_FN
             )
+            COLLECTIONS[name] = collection
             print(f"✅ Collection '{name}' ready: {config['description']}")
         except Exception as e:
             print(f"❌ Error creating collection '{name}': {e}")
 
-@app.get("/health")
+@app.api_route("/health", methods=["GET", "HEAD"])
 async def health_check():
     """Health check endpoint"""
     return {
@@ -113,6 +146,7 @@ async def health_check():
 # ===== Stripe & Supabase Billing Integration =====
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY") or ""
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET") or ""
+MAX_WEBHOOK_BYTES = 1024 * 1024
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -126,43 +160,129 @@ if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
 else:
     print("⚠️ SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY not set; billing upserts will be skipped")
 
+# Async client for request-time upserts; the sync client above stays as the fallback
+supabase_async: Optional[AClient] = None
+
+@app.on_event("startup")
+async def init_supabase_async():
+    """Create the async Supabase client once the event loop is running"""
+    global supabase_async
+    if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+        try:
+            supabase_async = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        except Exception as e:
+            print(f"⚠️ Async Supabase client unavailable, using sync client: {e}")
+
 # ===== Clerk JWT Verification =====
 CLERK_ISSUER = os.getenv("CLERK_ISSUER") or os.getenv("CLERK_JWT_ISSUER")
 CLERK_AUDIENCE = os.getenv("API_JWT_AUDIENCE")
 
-@lru_cache(maxsize=1)
-def get_clerk_jwks():
+# Signing keys are parsed once and looked up by kid. The set is refetched
+# when the JWKS response's max-age runs out (never sooner than the floor)
+# or, at most once per JWKS_MISS_REFRESH_SECONDS, when an unknown kid shows up.
+JWKS_MIN_MAX_AGE = 600
+JWKS_MISS_REFRESH_SECONDS = 60
+_jwks_by_kid: Dict[str, Any] = {}
+_jwks_fetched_at = 0.0
+_jwks_expires_at = 0.0
+_jwks_lock = threading.Lock()
+# Shared session so JWKS refreshes reuse the pooled connection
+_http = requests.Session()
+
+def _refresh_jwks():
+    global _jwks_by_kid, _jwks_fetched_at, _jwks_expires_at
     if not CLERK_ISSUER:
         raise RuntimeError("CLERK_ISSUER not configured")
     jwks_url = f"{CLERK_ISSUER.rstrip('/')}/.well-known/jwks.json"
-    resp = requests.get(jwks_url, timeout=5)
+    resp = _http.get(jwks_url, timeout=5)
     resp.raise_for_status()
-    return resp.json()
+    keys = {}
+    for k in resp.json().get("keys", []):
+        if k.get("kid"):
+            keys[k["kid"]] = jwk.construct(k, algorithm=k.get("alg", "RS256"))
+    max_age = re.search(r"max-age=(\d+)", resp.headers.get("Cache-Control", ""))
+    now = time.time()
+    _jwks_by_kid = keys
+    _jwks_fetched_at = now
+    _jwks_expires_at = now + max(int(max_age.group(1)) if max_age else 0, JWKS_MIN_MAX_AGE)
+
+def get_clerk_signing_key(kid: Optional[str]):
+    """Return the parsed signing key for kid, refetching the JWKS when stale or on a miss"""
+    with _jwks_lock:
+        now = time.time()
+        if now >= _jwks_expires_at:
+            _refresh_jwks()
+        key = _jwks_by_kid.get(kid)
+        if key is None and now - _jwks_fetched_at >= JWKS_MISS_REFRESH_SECONDS:
+            _refresh_jwks()
+            key = _jwks_by_kid.get(kid)
+        return key
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Release pooled outbound connections"""
+    _http.close()
+
+# Verified claims by token hash, so replayed bearer tokens skip the RSA check.
+# Entries live at most JWT_CACHE_TTL seconds and never past the token's exp.
+JWT_CACHE_TTL = 30
+JWT_CACHE_MAXSIZE = 10_000
+_jwt_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_jwt_cache_lock = threading.Lock()
+
+def _jwt_cache_get(token_hash: str) -> Optional[Dict[str, Any]]:
+    with _jwt_cache_lock:
+        entry = _jwt_cache.get(token_hash)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del _jwt_cache[token_hash]
+            return None
+        _jwt_cache.move_to_end(token_hash)
+        return payload
+
+def _jwt_cache_put(token_hash: str, payload: Dict[str, Any]):
+    now = time.time()
+    expires_at = now + JWT_CACHE_TTL
+    if payload.get("exp"):
+        expires_at = min(expires_at, float(payload["exp"]))
+    if expires_at <= now:
+        return
+    with _jwt_cache_lock:
+        _jwt_cache[token_hash] = (expires_at, payload)
+        _jwt_cache.move_to_end(token_hash)
+        while len(_jwt_cache) > JWT_CACHE_MAXSIZE:
+            _jwt_cache.popitem(last=False)
+
+def _verify_sync(token: str) -> Dict[str, Any]:
+    """Blocking part of JWT verification: JWKS fetch on cache miss and signature check"""
+    unverified_header = jwt.get_unverified_header(token)
+    key = get_clerk_signing_key(unverified_header.get("kid"))
+    if not key:
+        raise HTTPException(status_code=401, detail="Unable to find matching JWK")
+    options = {"verify_aud": bool(CLERK_AUDIENCE)}
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[unverified_header.get("alg", "RS256")],
+        audience=CLERK_AUDIENCE if CLERK_AUDIENCE else None,
+        issuer=CLERK_ISSUER,
+        options=options,
+    )
 
-def verify_clerk_jwt(authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
+async def verify_clerk_jwt(authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
     token = authorization.split(" ", 1)[1]
+    token_hash = hashlib.sha256(token.encode()).hexdigest()[:32]
+    cached = _jwt_cache_get(token_hash)
+    if cached is not None:
+        return cached
     try:
-        unverified_header = jwt.get_unverified_header(token)
-        kid = unverified_header.get("kid")
-        jwks = get_clerk_jwks()
-        key = None
-        for k in jwks.get("keys", []):
-            if k.get("kid") == kid:
-                key = k
-                break
-        if not key:
-            raise HTTPException(status_code=401, detail="Unable to find matching JWK")
-        options = {"verify_aud": bool(CLERK_AUDIENCE)}
-        payload = jwt.decode(
-            token,
-            key,
-            algorithms=[unverified_header.get("alg", "RS256")],
-            audience=CLERK_AUDIENCE if CLERK_AUDIENCE else None,
-            issuer=CLERK_ISSUER,
-            options=options,
-        )
+        # Keep network I/O and RSA verification off the event loop
+        payload = await run_in_threadpool(_verify_sync, token)
+        _jwt_cache_put(token_hash, payload)
         return payload  # claims
     except HTTPException:
         raise
@@ -182,26 +302,77 @@ async def upsert_plan_to_supabase(user_id: str, plan: Optional[str], current_per
             "updated_at": datetime.now().isoformat()
         }
         # Assumes a table named 'subscriptions' with a unique constraint on user_id
-        res = supabase.table("subscriptions").upsert(payload, on_conflict="user_id").execute()
+        if supabase_async is not None:
+            res = await supabase_async.table("subscriptions").upsert(payload, on_conflict="user_id").execute()
+        else:
+            res = await run_in_threadpool(
+                supabase.table("subscriptions").upsert(payload, on_conflict="user_id").execute
+            )
         print(f"✅ Upserted billing for user {user_id}: {res}")
     except Exception as e:
         print(f"❌ Supabase upsert failed: {e}")
 
+# Recently processed Stripe event ids, so retried deliveries skip the Stripe and
+# Supabase round-trips. Stripe retries for up to 3 days, so a persistent
+# processed_events(id primary key, created_at) table is the durable long-term fix.
+STRIPE_EVENT_TTL = 3600
+STRIPE_EVENT_MAXSIZE = 50_000
+_seen_events: "OrderedDict[str, float]" = OrderedDict()
+
+def _event_seen(event_id: str) -> bool:
+    """Record event_id and report whether it was already processed within the TTL"""
+    now = time.time()
+    # Insertion order is arrival order, so expired or excess entries sit at the front
+    while _seen_events:
+        seen_at = next(iter(_seen_events.values()))
+        if now - seen_at < STRIPE_EVENT_TTL and len(_seen_events) < STRIPE_EVENT_MAXSIZE:
+            break
+        _seen_events.popitem(last=False)
+    if event_id in _seen_events:
+        return True
+    _seen_events[event_id] = now
+    return False
+
+async def _enrich_and_upsert(user_id: str, plan: Optional[str], subscription_id: Optional[str]):
+    """Fetch the subscription period end and upsert the plan, after the webhook has been acknowledged"""
+    try:
+        current_period_end_iso = None
+        if subscription_id:
+            sub = await stripe.Subscription.retrieve_async(subscription_id)
+            cpe = sub.get("current_period_end")
+            if cpe:
+                current_period_end_iso = datetime.fromtimestamp(int(cpe)).isoformat()
+        await upsert_plan_to_supabase(user_id, plan, current_period_end_iso, subscription_id)
+    except Exception as e:
+        print(f"❌ Error processing checkout.session.completed: {e}")
+
 @app.post("/webhook/stripe")
-async def stripe_webhook(request: Request, stripe_signature: Optional[str] = Header(None, alias="Stripe-Signature")):
+async def stripe_webhook(request: Request, background_tasks: BackgroundTasks, stripe_signature: Optional[str] = Header(None, alias="Stripe-Signature")):
     if not STRIPE_WEBHOOK_SECRET:
         raise HTTPException(status_code=500, detail="Stripe webhook secret not configured")
     if not stripe_signature:
         raise HTTPException(status_code=400, detail="Missing Stripe-Signature header")
 
-    payload = await request.body()
+    # Read the body in chunks and reject oversized payloads before buffering them whole
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_WEBHOOK_BYTES:
+        raise HTTPException(status_code=413, detail="Webhook payload too large")
+    payload = bytearray()
+    async for chunk in request.stream():
+        payload += chunk
+        if len(payload) > MAX_WEBHOOK_BYTES:
+            raise HTTPException(status_code=413, detail="Webhook payload too large")
     try:
-        event = stripe.Webhook.construct_event(payload, stripe_signature, STRIPE_WEBHOOK_SECRET)
+        # Stripe signs the full raw body, so verification still needs all of it
+        event = stripe.Webhook.construct_event(bytes(payload), stripe_signature, STRIPE_WEBHOOK_SECRET)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid payload")
     except stripe.error.SignatureVerificationError:
         raise HTTPException(status_code=400, detail="Invalid signature")
 
+    if event.get("id") and _event_seen(event["id"]):
+        return {"received": True, "dedup": True}
+
     event_type = event.get("type")
     data_object = event.get("data", {}).get("object", {})
 
@@ -211,14 +382,9 @@ async def stripe_webhook(request: Request, stripe_signature: Optional[str] = Hea
             user_id = session.get("client_reference_id") or (session.get("metadata") or {}).get("user_id")
             plan = (session.get("metadata") or {}).get("plan")
             subscription_id = session.get("subscription")
-            current_period_end_iso = None
-            if subscription_id:
-                sub = stripe.Subscription.retrieve(subscription_id)
-                cpe = sub.get("current_period_end")
-                if cpe:
-                    current_period_end_iso = datetime.fromtimestamp(int(cpe)).isoformat()
             if user_id:
-                await upsert_plan_to_supabase(user_id, plan, current_period_end_iso, subscription_id)
+                # Acknowledge Stripe right away; the subscription lookup and upsert run afterwards
+                background_tasks.add_task(_enrich_and_upsert, user_id, plan, subscription_id)
             else:
                 print("⚠️ checkout.session.completed missing user_id; skipping upsert")
         except Exception as e:
@@ -228,10 +394,10 @@ async def stripe_webhook(request: Request, stripe_signature: Optional[str] = Hea
 
 # ===== SendGrid Email Test (Protected) =====
 try:
-    from .services.email import send_template  # package-relative import
+    from .services.email import send_template_async  # package-relative import
 except Exception:
     # Fallback for environments running without package context
-    from services.email import send_template  # type: ignore
+    from services.email import send_template_async  # type: ignore
 
 @app.post("/api/email/test")
 async def email_test(body: Dict[str, Any], claims: Dict[str, Any] = Depends(verify_clerk_jwt)):
@@ -241,7 +407,8 @@ async def email_test(body: Dict[str, Any], claims: Dict[str, Any] = Depends(veri
     if not to or not template_id:
         raise HTTPException(status_code=400, detail="Required: to, template_id")
     try:
-        result = send_template(to_email=to, template_id=template_id, dynamic_data=dynamic_data)
+        result = await send_template_async(to_email=to, template_id=template_id, dynamic_data=dynamic_data,
+                                           return_headers=True)
         return {"status": "sent", "to": to, "template_id": template_id, "result": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"SendGrid error: {e}")
@@ -252,7 +419,7 @@ async def retrieve_context(request: QueryRequest):
     Retrieve semantically similar contexts for a given query
     """
     try:
-        collection = chroma_client.get_collection(name=request.collection_name)
+        collection = get_collection_handle(request.collection_name)
         
         # Perform semantic search
         results = collection.query(
@@ -268,21 +435,24 @@ async def retrieve_context(request: QueryRequest):
         metadatas = results['metadatas'][0] if results['metadatas'] else []
         
         # Build query context for analysis
+        d = np.asarray(distances, dtype=np.float32)
         query_context = {
             "query_length": len(request.query_text),
             "collection_used": request.collection_name,
             "results_found": len(documents),
-            "avg_similarity": sum(distances) / len(distances) if distances else 0,
+            "avg_similarity": float(d.mean()) if d.size else 0.0,
+            "min_distance": float(d.min()) if d.size else 0.0,
             "timestamp": datetime.now().isoformat()
         }
         
-        return RetrievalResponse(
-            documents=documents,
-            ids=ids,
-            distances=distances,
-            metadatas=metadatas,
-            query_context=query_context
-        )
+        # Chroma output already matches RetrievalResponse; skip the pydantic round-trip
+        return ORJSONResponse({
+            "documents": documents,
+            "ids": ids,
+            "distances": distances,
+            "metadatas": metadatas,
+            "query_context": query_context
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Retrieval error: {str(e)}")
@@ -293,21 +463,23 @@ async def add_context(request: AddContextRequest):
     Add new context to the vector store
     """
     try:
-        collection = chroma_client.get_or_create_collection(name=request.collection_name)
+        collection = get_collection_handle(request.collection_name, create=True)
         
         # Generate IDs if not provided
         if not request.ids:
-            request.ids = [str(uuid.uuid4()) for _ in request.documents]
+            request.ids = [uuid.uuid4().hex for _ in request.documents]
         
         # Add default metadata if not provided
         if not request.metadatas:
-            request.metadatas = [{"timestamp": datetime.now().isoformat()} for _ in request.documents]
+            # One shared dict is fine: Chroma copies metadata on write
+            request.metadatas = [{"timestamp": datetime.now().isoformat()}] * len(request.documents)
         
         collection.upsert(
             documents=request.documents,
             metadatas=request.metadatas,
             ids=request.ids
         )
+        _invalidate_collections_listing()
         
         return {
             "status": "success",
@@ -319,14 +491,80 @@ async def add_context(request: AddContextRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Add context error: {str(e)}")
 
+# Conversation turns are queued and written in batches, so embedding and Chroma's
+# write path run once per batch instead of once per turn. A turn becomes
+# searchable at most CONV_FLUSH_INTERVAL seconds after it is queued. The queue is
+# bounded so a stalled Chroma backs pressure onto /store_conversation instead of memory.
+CONV_BATCH_SIZE = 32
+CONV_FLUSH_INTERVAL = 0.1
+CONV_QUEUE_MAXSIZE = 1000
+CONV_RETRY_DELAY = 0.5
+CONV_QUEUE: "asyncio.Queue[tuple]" = asyncio.Queue(maxsize=CONV_QUEUE_MAXSIZE)
+_conv_flusher_task: Optional[asyncio.Task] = None
+
+async def _flush_conversations(batch: List[tuple]):
+    """Upsert a batch of queued (id, document, metadata) conversation turns, retrying once"""
+    ids, documents, metadatas = zip(*batch)
+    for attempt in range(2):
+        try:
+            collection = get_collection_handle("helen_contexts", create=True)
+            await run_in_threadpool(
+                collection.upsert,
+                documents=list(documents),
+                metadatas=list(metadatas),
+                ids=list(ids)
+            )
+            _invalidate_collections_listing()
+            return
+        except Exception:
+            if attempt == 0:
+                # Upserts are idempotent on id, so a repeat after a transient failure is safe
+                await asyncio.sleep(CONV_RETRY_DELAY)
+                continue
+            logger.exception("Dropped %d conversation turns after retry: %s", len(batch), list(ids))
+
+async def _conv_flusher():
+    """Drain the conversation queue, coalescing turns that arrive close together; None stops it"""
+    loop = asyncio.get_running_loop()
+    running = True
+    while running:
+        item = await CONV_QUEUE.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = loop.time() + CONV_FLUSH_INTERVAL
+        while len(batch) < CONV_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(CONV_QUEUE.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+        await _flush_conversations(batch)
+
+@app.on_event("startup")
+async def start_conv_flusher():
+    global _conv_flusher_task
+    _conv_flusher_task = asyncio.create_task(_conv_flusher())
+
+@app.on_event("shutdown")
+async def stop_conv_flusher():
+    """Write out anything still queued before the process exits"""
+    if _conv_flusher_task:
+        await CONV_QUEUE.put(None)
+        await _conv_flusher_task
+
 @app.post("/store_conversation")
 async def store_conversation(context: ConversationContext):
     """
     Store a conversation turn for future retrieval
     """
     try:
-        collection = chroma_client.get_or_create_collection(name="helen_contexts")
-        
         # Create rich document from conversation context
         document = f"User: {context.user_message}\nHelen: {context.ai_response}"
         
@@ -344,14 +582,12 @@ async def store_conversation(context: ConversationContext):
         
         doc_id = f"{context.session_id}_{datetime.now().timestamp()}"
         
-        collection.upsert(
-            documents=[document],
-            metadatas=[metadata],
-            ids=[doc_id]
-        )
+        # Chroma rejects None metadata values, which would fail the whole batch
+        metadata = {key: value for key, value in metadata.items() if value is not None}
+        await CONV_QUEUE.put((doc_id, document, metadata))
         
         return {
-            "status": "stored",
+            "status": "queued",
             "document_id": doc_id,
             "collection": "helen_contexts"
         }
@@ -359,24 +595,36 @@ async def store_conversation(context: ConversationContext):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Store conversation error: {str(e)}")
 
+# Short-lived cache of the /collections listing so dashboard polling doesn't recount;
+# writes through this service drop it so counts never lag behind them
+COLLECTIONS_LISTING_TTL = 10
+_collections_listing: Optional[tuple] = None
+
+def _invalidate_collections_listing():
+    global _collections_listing
+    _collections_listing = None
+
 @app.get("/collections")
 async def list_collections():
     """
     List all available collections and their stats
     """
+    global _collections_listing
     try:
-        collections = chroma_client.list_collections()
-        collection_info = []
+        if _collections_listing and _collections_listing[0] > time.time():
+            return _collections_listing[1]
         
-        for collection in collections:
-            count = collection.count()
-            collection_info.append({
-                "name": collection.name,
-                "count": count,
-                "metadata": collection.metadata
-            })
+        collections = await run_in_threadpool(chroma_client.list_collections)
+        # Each count is its own SQLite query, so run them side by side
+        counts = await asyncio.gather(*[run_in_threadpool(c.count) for c in collections])
+        collection_info = [
+            {"name": c.name, "count": count, "metadata": c.metadata}
+            for c, count in zip(collections, counts)
+        ]
         
-        return {"collections": collection_info}
+        result = {"collections": collection_info}
+        _collections_listing = (time.time() + COLLECTIONS_LISTING_TTL, result)
+        return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"List collections error: {str(e)}")
@@ -387,8 +635,9 @@ async def clear_collection(collection_name: str):
     Clear all documents from a collection (use with caution!)
     """
     try:
-        collection = chroma_client.get_collection(name=collection_name)
+        collection = get_collection_handle(collection_name)
         collection.delete()
+        _invalidate_collections_listing()
         
         return {
             "status": "cleared",
@@ -404,6 +653,33 @@ class ADHDContextRequest(BaseModel):
     user_patterns: Optional[Dict[str, Any]] = None
     session_context: Optional[Dict[str, Any]] = None
 
+# Multi-collection search for comprehensive context. Each collection keeps its own
+# index so every bucket gets its own top 3, which one merged top-k could not guarantee.
+ADHD_CONTEXT_COLLECTIONS = (
+    "helen_contexts",
+    "therapeutic_responses",
+    "intervention_library"
+)
+
+async def _search_one(coll_name: str, query_embeddings: List[List[float]], where: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Query one collection for the ADHD context search, returning empty results on failure"""
+    try:
+        collection = get_collection_handle(coll_name)
+        results = await run_in_threadpool(
+            collection.query,
+            query_embeddings=query_embeddings,
+            n_results=3,
+            where=where
+        )
+        return {
+            "documents": results['documents'][0] if results['documents'] else [],
+            "metadatas": results['metadatas'][0] if results['metadatas'] else [],
+            "distances": results['distances'][0] if results['distances'] else []
+        }
+    except Exception as e:
+        print(f"Warning: Could not search collection {coll_name}: {e}")
+        return {"documents": [], "metadatas": [], "distances": []}
+
 # Enhanced retrieval for ADHD-specific patterns
 @app.post("/retrieve_adhd_context")
 async def retrieve_adhd_context(request: ADHDContextRequest):
@@ -411,55 +687,37 @@ async def retrieve_adhd_context(request: ADHDContextRequest):
     Specialized retrieval for ADHD-specific contextual responses
     """
     try:
-        # Multi-collection search for comprehensive context
-        collections_to_search = [
-            "helen_contexts",
-            "therapeutic_responses", 
-            "intervention_library"
-        ]
+        # Build the where clause once; Chroma needs an explicit $and for several conditions
+        patterns = request.user_patterns or {}
+        conditions = [{key: patterns[key]} for key in ("attention_status", "crisis_level") if patterns.get(key)]
+        where = None
+        if conditions:
+            where = conditions[0] if len(conditions) == 1 else {"$and": conditions}
         
-        all_results = {}
+        # Embed the query once; the searches are independent, so run them side by side
+        query_embeddings = await run_in_threadpool(EMBED_FN, [request.query_text])
+        results_list = await asyncio.gather(*[
+            _search_one(coll_name, query_embeddings, where)
+            for coll_name in ADHD_CONTEXT_COLLECTIONS
+        ])
+        all_results = dict(zip(ADHD_CONTEXT_COLLECTIONS, results_list))
         
-        for coll_name in collections_to_search:
-            try:
-                collection = chroma_client.get_collection(name=coll_name)
-                
-                # Build filters based on context
-                filters = {}
-                if request.user_patterns:
-                    if request.user_patterns.get("attention_status"):
-                        filters["attention_status"] = request.user_patterns["attention_status"]
-                    if request.user_patterns.get("crisis_level"):
-                        filters["crisis_level"] = request.user_patterns["crisis_level"]
-                
-                results = collection.query(
-                    query_texts=[request.query_text],
-                    n_results=3,
-                    where=filters if filters else None
-                )
-                
-                all_results[coll_name] = {
-                    "documents": results['documents'][0] if results['documents'] else [],
-                    "metadatas": results['metadatas'][0] if results['metadatas'] else [],
-                    "distances": results['distances'][0] if results['distances'] else []
-                }
-                
-            except Exception as e:
-                print(f"Warning: Could not search collection {coll_name}: {e}")
-                all_results[coll_name] = {"documents": [], "metadatas": [], "distances": []}
-        
-        # Analyze and synthesize results
+        # Analyze and synthesize results; the best match is the collection closest on average
+        mean_distances = {
+            name: float(np.asarray(r["distances"], dtype=np.float32).mean())
+            for name, r in all_results.items() if r["distances"]
+        }
         context_synthesis = {
             "query": request.query_text,
             "retrieved_contexts": all_results,
             "synthesis": {
                 "total_contexts_found": sum(len(r["documents"]) for r in all_results.values()),
-                "best_match_collection": max(all_results.keys(), 
-                    key=lambda k: len(all_results[k]["documents"])) if all_results else None,
+                "best_match_collection": min(mean_distances, key=mean_distances.get) if mean_distances else None,
                 "attention_adaptations_needed": request.user_patterns.get("attention_status") == "fading" if request.user_patterns else False,
-                "crisis_context_available": any("crisis" in str(meta).lower() 
-                    for results in all_results.values() 
-                    for meta in results["metadatas"]),
+                "crisis_context_available": any(
+                    meta.get("crisis_level") not in (None, "", "none")
+                    for results in all_results.values()
+                    for meta in results["metadatas"] if meta),
                 "timestamp": datetime.now().isoformat()
             }
         }
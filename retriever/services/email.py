@@ -1,15 +1,28 @@
+import asyncio
 import os
 from typing import Any, Dict, Optional
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
+from python_http_client.exceptions import HTTPError
 
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 DEFAULT_FROM = os.getenv("EMAIL_FROM", "Helen <no-reply@localhost>")
 
+# One client for the process instead of one per send
+_sg = SendGridAPIClient(SENDGRID_API_KEY) if SENDGRID_API_KEY else None
+
 class EmailNotConfigured(Exception):
     pass
 
-def send_template(to_email: str, template_id: str, dynamic_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+class EmailSendError(Exception):
+    """SendGrid rejected the send; carries the status code and decoded error body"""
+    def __init__(self, status_code: int, body: Optional[str]):
+        super().__init__(f"HTTP {status_code}: {body}")
+        self.status_code = status_code
+        self.body = body
+
+def send_template(to_email: str, template_id: str, dynamic_data: Optional[Dict[str, Any]] = None,
+                  return_headers: bool = False) -> Dict[str, Any]:
     """
     Send a SendGrid dynamic template email.
 
@@ -17,11 +30,15 @@ def send_template(to_email: str, template_id: str, dynamic_data: Optional[Dict[s
         to_email: Recipient email address
         template_id: SendGrid dynamic template ID
         dynamic_data: Dictionary of template data for handlebars variables
+        return_headers: Include the response headers in the result
 
     Returns:
         Dict with message_id and status.
+
+    Raises:
+        EmailSendError: SendGrid answered with a 4xx/5xx status
     """
-    if not SENDGRID_API_KEY:
+    if not _sg:
         raise EmailNotConfigured("SENDGRID_API_KEY is not set")
 
     message = Mail(
@@ -32,11 +49,25 @@ def send_template(to_email: str, template_id: str, dynamic_data: Optional[Dict[s
     if dynamic_data:
         message.dynamic_template_data = dynamic_data
 
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
-    response = sg.send(message)
+    try:
+        response = _sg.send(message)
+    except HTTPError as e:
+        # The client raises on 4xx/5xx; only these responses carry a body worth decoding
+        body = e.body.decode("utf-8", errors="replace") if e.body else None
+        raise EmailSendError(e.status_code, body) from e
+    # SendGrid answers 202 with an empty body, so a success is not decoded
     return {
         "status_code": response.status_code,
-        "headers": dict(response.headers),
-        "body": getattr(response, "body", None).decode("utf-8") if getattr(response, "body", None) else None,
+        "headers": dict(response.headers) if return_headers else None,
+        "body": None,
     }
 
+async def send_template_async(to_email: str, template_id: str, dynamic_data: Optional[Dict[str, Any]] = None,
+                              return_headers: bool = False) -> Dict[str, Any]:
+    """
+    Async wrapper around send_template for request handlers.
+
+    The SendGrid client is blocking, so the send runs in a worker thread
+    instead of stalling the event loop.
+    """
+    return await asyncio.to_thread(send_template, to_email, template_id, dynamic_data, return_headers)
@@ -4,21 +4,111 @@ Conversation Management Guide Seeder
 Seeds the ChromaDB with conversation management techniques from the JSON guide
 """
 
-import json
-import requests
+import orjson
+from http_session import HEALTH_TIMEOUT, JSON_HEADERS, REQUEST_TIMEOUT, SEED_BATCH_SIZE, SEED_RETRY
+from http_session import PooledSessionClient, content_digest, make_session
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
-import time
+from types import MappingProxyType
+from typing import Dict, Any, Final, List, Mapping, Tuple
 
-class ConversationGuideSeeder:
+# Metadata shared by every document of a kind; reused by reference rather than rebuilt per item.
+# Read-only views so an in-place edit can never leak into every document of that kind.
+_META_OPEN_QUESTION: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "open_question",
+    "purpose": "exploration",
+    "technique": "motivational_interviewing",
+    "category": "conversation_starter",
+    "tone": "gentle"
+})
+
+_META_AFFIRMATION: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "affirmation",
+    "purpose": "validation",
+    "technique": "person_centered",
+    "category": "emotional_support",
+    "tone": "validating"
+})
+
+_META_REFLECTION_STARTER: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "reflection_starter",
+    "purpose": "active_listening",
+    "technique": "motivational_interviewing",
+    "category": "conversation_technique",
+    "complexity": "simple"
+})
+
+_META_SUMMARY_STARTER: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "summary_starter",
+    "purpose": "consolidation",
+    "technique": "motivational_interviewing",
+    "category": "conversation_technique",
+    "usage": "transition"
+})
+
+_META_INVITATION_ENDING: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "invitation_ending",
+    "purpose": "collaboration",
+    "technique": "motivational_interviewing",
+    "category": "conversation_technique",
+    "usage": "closure"
+})
+
+_META_AMBIVALENCE_TEMPLATE: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "ambivalence_template",
+    "purpose": "conflict_resolution",
+    "technique": "motivational_interviewing",
+    "category": "conversation_technique",
+    "usage": "template"
+})
+
+_META_GROUNDING_PROMPT: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "grounding_prompt",
+    "purpose": "crisis_stabilization",
+    "technique": "grounding",
+    "category": "crisis_intervention",
+    "crisis_level": "moderate",
+    "duration": "1-2 minutes"
+})
+
+_META_CHOICE_SCAFFOLD: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "choice_scaffold",
+    "purpose": "executive_function_support",
+    "technique": "structured_choice",
+    "category": "adhd_support",
+    "crisis_level": "mild",
+    "usage": "decision_making"
+})
+
+_META_TINY_STEP: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "tiny_step",
+    "purpose": "task_initiation",
+    "technique": "behavioral_activation",
+    "category": "executive_function",
+    "adhd_support": "task_paralysis",
+    "difficulty": "minimal"
+})
+
+_META_EXTERNALIZATION_PROMPT: Final[Mapping[str, str]] = MappingProxyType({
+    "type": "externalization_prompt",
+    "purpose": "cognitive_offloading",
+    "technique": "externalization",
+    "category": "executive_function",
+    "adhd_support": "working_memory",
+    "difficulty": "low"
+})
+
+class ConversationGuideSeeder(PooledSessionClient):
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
         self.guide_file = Path(__file__).parent / "conversation_management_guide.json"
+        self.session = make_session(SEED_RETRY)
     
     def check_service_health(self) -> bool:
         """Check if the vector service is running"""
         try:
-            response = requests.get(f"{self.base_url}/health")
+            # HEAD skips the body; the status code is all that matters here
+            response = self.session.head(f"{self.base_url}/health", timeout=HEALTH_TIMEOUT)
             return response.status_code == 200
         except:
             return False
@@ -26,68 +116,59 @@ class ConversationGuideSeeder:
     def load_conversation_guide(self) -> Dict[str, Any]:
         """Load the conversation management guide JSON"""
         try:
-            with open(self.guide_file, 'r') as f:
-                return json.load(f)
+            return orjson.loads(self.guide_file.read_bytes())
         except Exception as e:
             print(f"❌ Error loading conversation guide: {e}")
             return {}
     
-    def add_to_collection(self, collection_name: str, documents: List[str], metadatas: List[Dict[str, Any]]) -> bool:
+    def add_to_collection(self, collection_name: str, documents: List[str], metadatas: List[Mapping[str, Any]]) -> bool:
         """Add documents to a ChromaDB collection"""
+        # Content-derived ids make re-seeding an upsert instead of a duplicate insert
+        unique = {content_digest(doc): (doc, metadata) for doc, metadata in zip(documents, metadatas)}
         try:
-            response = requests.post(f"{self.base_url}/add_context", json={
-                "documents": documents,
-                "metadatas": metadatas,
+            # orjson encodes the body directly to bytes; default=dict handles the read-only templates
+            body = orjson.dumps({
+                "documents": [doc for doc, _ in unique.values()],
+                "metadatas": [metadata for _, metadata in unique.values()],
+                "ids": list(unique),
                 "collection_name": collection_name
-            })
+            }, default=dict)
+            response = self.session.post(f"{self.base_url}/add_context", data=body,
+                                         headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
             return response.status_code == 200
         except Exception as e:
             print(f"   ❌ Error adding to {collection_name}: {e}")
             return False
     
-    def seed_open_questions(self, guide: Dict[str, Any]):
+    def add_in_batches(self, collection_name: str, documents: List[str], metadatas: List[Mapping[str, Any]]) -> bool:
+        """Add documents in SEED_BATCH_SIZE chunks, stopping at the first failure"""
+        return all(
+            self.add_to_collection(collection_name, documents[start:start + SEED_BATCH_SIZE],
+                                   metadatas[start:start + SEED_BATCH_SIZE])
+            for start in range(0, len(documents), SEED_BATCH_SIZE)
+        )
+    
+    def seed_open_questions(self, guide: Dict[str, Any]) -> Tuple[List[str], List[Mapping[str, Any]]]:
         """Seed open-ended questions for exploration"""
         print("❓ Seeding open questions...")
         
         questions = guide.get("open_questions", [])
         documents = questions
-        metadatas = [
-            {
-                "type": "open_question",
-                "purpose": "exploration",
-                "technique": "motivational_interviewing",
-                "category": "conversation_starter",
-                "tone": "gentle"
-            } for _ in questions
-        ]
+        metadatas = [_META_OPEN_QUESTION] * len(questions)
         
-        if self.add_to_collection("therapeutic_responses", documents, metadatas):
-            print(f"   ✅ Added {len(documents)} open questions")
-        else:
-            print(f"   ❌ Failed to add open questions")
+        return documents, metadatas
     
-    def seed_affirmations(self, guide: Dict[str, Any]):
+    def seed_affirmations(self, guide: Dict[str, Any]) -> Tuple[List[str], List[Mapping[str, Any]]]:
         """Seed validation and affirmation statements"""
         print("💙 Seeding affirmations...")
         
         affirmations = guide.get("affirmations", [])
         documents = affirmations
-        metadatas = [
-            {
-                "type": "affirmation",
-                "purpose": "validation",
-                "technique": "person_centered",
-                "category": "emotional_support",
-                "tone": "validating"
-            } for _ in affirmations
-        ]
+        metadatas = [_META_AFFIRMATION] * len(affirmations)
         
-        if self.add_to_collection("therapeutic_responses", documents, metadatas):
-            print(f"   ✅ Added {len(documents)} affirmations")
-        else:
-            print(f"   ❌ Failed to add affirmations")
+        return documents, metadatas
     
-    def seed_reflection_techniques(self, guide: Dict[str, Any]):
+    def seed_reflection_techniques(self, guide: Dict[str, Any]) -> Tuple[List[str], List[Mapping[str, Any]]]:
         """Seed reflection and mirroring techniques"""
         print("🪞 Seeding reflection techniques...")
         
@@ -96,36 +177,27 @@ class ConversationGuideSeeder:
         metadatas = []
         
         # Simple reflection starters
-        for starter in reflections.get("simple_reflection_starters", []):
-            documents.append(starter)
-            metadatas.append({
-                "type": "reflection_starter",
-                "purpose": "active_listening",
-                "technique": "motivational_interviewing",
-                "category": "conversation_technique",
-                "complexity": "simple"
-            })
+        simple_reflection_starters = reflections.get("simple_reflection_starters", [])
+        documents.extend(simple_reflection_starters)
+        metadatas.extend([_META_REFLECTION_STARTER] * len(simple_reflection_starters))
         
         # Complex reflection types
         complex_types = reflections.get("complex_reflection_types", {})
         for reflection_type, examples in complex_types.items():
-            for example in examples:
-                documents.append(example)
-                metadatas.append({
-                    "type": "reflection_example",
-                    "purpose": "deep_understanding",
-                    "technique": "motivational_interviewing",
-                    "category": "conversation_technique",
-                    "complexity": "complex",
-                    "reflection_type": reflection_type
-                })
+            metadata = {
+                "type": "reflection_example",
+                "purpose": "deep_understanding",
+                "technique": "motivational_interviewing",
+                "category": "conversation_technique",
+                "complexity": "complex",
+                "reflection_type": reflection_type
+            }
+            documents.extend(examples)
+            metadatas.extend([metadata] * len(examples))
         
-        if self.add_to_collection("therapeutic_responses", documents, metadatas):
-            print(f"   ✅ Added {len(documents)} reflection techniques")
-        else:
-            print(f"   ❌ Failed to add reflection techniques")
+        return documents, metadatas
     
-    def seed_summary_techniques(self, guide: Dict[str, Any]):
+    def seed_summary_techniques(self, guide: Dict[str, Any]) -> Tuple[List[str], List[Mapping[str, Any]]]:
         """Seed summary and consolidation techniques"""
         print("📝 Seeding summary techniques...")
         
@@ -134,58 +206,36 @@ class ConversationGuideSeeder:
         metadatas = []
         
         # Summary starters
-        for starter in summaries.get("starters", []):
-            documents.append(starter)
-            metadatas.append({
-                "type": "summary_starter",
-                "purpose": "consolidation",
-                "technique": "motivational_interviewing",
-                "category": "conversation_technique",
-                "usage": "transition"
-            })
+        starters = summaries.get("starters", [])
+        documents.extend(starters)
+        metadatas.extend([_META_SUMMARY_STARTER] * len(starters))
         
         # Change talk indicators
         structure = summaries.get("structure", {})
         change_talk = structure.get("change_talk_indicators", {})
-        for indicator_type, text in change_talk.items():
-            documents.append(text)
-            metadatas.append({
-                "type": "change_talk_indicator",
-                "purpose": "motivation_building",
-                "technique": "motivational_interviewing",
-                "category": "behavioral_change",
-                "indicator_type": indicator_type
-            })
+        documents.extend(change_talk.values())
+        metadatas.extend({
+            "type": "change_talk_indicator",
+            "purpose": "motivation_building",
+            "technique": "motivational_interviewing",
+            "category": "behavioral_change",
+            "indicator_type": indicator_type
+        } for indicator_type in change_talk)
         
         # Invitation endings
-        for ending in structure.get("invitation_endings", []):
-            documents.append(ending)
-            metadatas.append({
-                "type": "invitation_ending",
-                "purpose": "collaboration",
-                "technique": "motivational_interviewing",
-                "category": "conversation_technique",
-                "usage": "closure"
-            })
+        invitation_endings = structure.get("invitation_endings", [])
+        documents.extend(invitation_endings)
+        metadatas.extend([_META_INVITATION_ENDING] * len(invitation_endings))
         
         # Ambivalence template
         ambivalence_template = structure.get("ambivalence_template", "")
         if ambivalence_template:
             documents.append(ambivalence_template)
-            metadatas.append({
-                "type": "ambivalence_template",
-                "purpose": "conflict_resolution",
-                "technique": "motivational_interviewing",
-                "category": "conversation_technique",
-                "usage": "template"
-            })
+            metadatas.append(_META_AMBIVALENCE_TEMPLATE)
         
-        if self.add_to_collection("therapeutic_responses", documents, metadatas):
-            print(f"   ✅ Added {len(documents)} summary techniques")
-        else:
-            print(f"   ❌ Failed to add summary techniques")
+        return documents, metadatas
     
-    def seed_deescalation_tools(self, guide: Dict[str, Any]):
+    def seed_deescalation_tools(self, guide: Dict[str, Any]) -> Tuple[List[str], List[Mapping[str, Any]]]:
         """Seed crisis de-escalation tools"""
         print("🛡️ Seeding de-escalation tools...")
         
@@ -194,35 +244,18 @@ class ConversationGuideSeeder:
         metadatas = []
         
         # Grounding prompts
-        for prompt in deescalation.get("grounding_prompts", []):
-            documents.append(prompt)
-            metadatas.append({
-                "type": "grounding_prompt",
-                "purpose": "crisis_stabilization",
-                "technique": "grounding",
-                "category": "crisis_intervention",
-                "crisis_level": "moderate",
-                "duration": "1-2 minutes"
-            })
+        grounding_prompts = deescalation.get("grounding_prompts", [])
+        documents.extend(grounding_prompts)
+        metadatas.extend([_META_GROUNDING_PROMPT] * len(grounding_prompts))
         
         # Choice scaffolds
-        for scaffold in deescalation.get("choice_scaffolds", []):
-            documents.append(scaffold)
-            metadatas.append({
-                "type": "choice_scaffold",
-                "purpose": "executive_function_support",
-                "technique": "structured_choice",
-                "category": "adhd_support",
-                "crisis_level": "mild",
-                "usage": "decision_making"
-            })
+        choice_scaffolds = deescalation.get("choice_scaffolds", [])
+        documents.extend(choice_scaffolds)
+        metadatas.extend([_META_CHOICE_SCAFFOLD] * len(choice_scaffolds))
         
-        if self.add_to_collection("intervention_library", documents, metadatas):
-            print(f"   ✅ Added {len(documents)} de-escalation tools")
-        else:
-            print(f"   ❌ Failed to add de-escalation tools")
+        return documents, metadatas
     
-    def seed_task_initiation_helpers(self, guide: Dict[str, Any]):
+    def seed_task_initiation_helpers(self, guide: Dict[str, Any]) -> Tuple[List[str], List[Mapping[str, Any]]]:
         """Seed task initiation and executive function helpers"""
         print("🚀 Seeding task initiation helpers...")
         
@@ -231,33 +264,16 @@ class ConversationGuideSeeder:
         metadatas = []
         
         # Tiny steps
-        for step in task_helpers.get("tiny_steps", []):
-            documents.append(step)
-            metadatas.append({
-                "type": "tiny_step",
-                "purpose": "task_initiation",
-                "technique": "behavioral_activation",
-                "category": "executive_function",
-                "adhd_support": "task_paralysis",
-                "difficulty": "minimal"
-            })
+        tiny_steps = task_helpers.get("tiny_steps", [])
+        documents.extend(tiny_steps)
+        metadatas.extend([_META_TINY_STEP] * len(tiny_steps))
         
         # Externalization prompts
-        for prompt in task_helpers.get("externalization_prompts", []):
-            documents.append(prompt)
-            metadatas.append({
-                "type": "externalization_prompt",
-                "purpose": "cognitive_offloading",
-                "technique": "externalization",
-                "category": "executive_function",
-                "adhd_support": "working_memory",
-                "difficulty": "low"
-            })
+        externalization_prompts = task_helpers.get("externalization_prompts", [])
+        documents.extend(externalization_prompts)
+        metadatas.extend([_META_EXTERNALIZATION_PROMPT] * len(externalization_prompts))
         
-        if self.add_to_collection("intervention_library", documents, metadatas):
-            print(f"   ✅ Added {len(documents)} task initiation helpers")
-        else:
-            print(f"   ❌ Failed to add task initiation helpers")
+        return documents, metadatas
     
     def seed_all(self):
         """Seed all conversation management techniques"""
@@ -277,23 +293,39 @@ class ConversationGuideSeeder:
         print(f"📖 Loaded conversation guide with {len(guide)} sections")
         print()
         
-        # Seed each section
-        self.seed_open_questions(guide)
-        time.sleep(0.5)  # Brief pause between operations
-        
-        self.seed_affirmations(guide)
-        time.sleep(0.5)
-        
-        self.seed_reflection_techniques(guide)
-        time.sleep(0.5)
-        
-        self.seed_summary_techniques(guide)
-        time.sleep(0.5)
-        
-        self.seed_deescalation_tools(guide)
-        time.sleep(0.5)
+        # Collect every section first, then add each collection in a single request
+        sections = [
+            ("therapeutic_responses", "open questions", self.seed_open_questions),
+            ("therapeutic_responses", "affirmations", self.seed_affirmations),
+            ("therapeutic_responses", "reflection techniques", self.seed_reflection_techniques),
+            ("therapeutic_responses", "summary techniques", self.seed_summary_techniques),
+            ("intervention_library", "de-escalation tools", self.seed_deescalation_tools),
+            ("intervention_library", "task initiation helpers", self.seed_task_initiation_helpers),
+        ]
+        batches: Dict[str, Tuple[List[str], List[Mapping[str, Any]]]] = {}
+        section_counts: Dict[str, List[Tuple[str, int]]] = {}
+        for collection_name, label, seed in sections:
+            documents, metadatas = seed(guide)
+            batch_documents, batch_metadatas = batches.setdefault(collection_name, ([], []))
+            batch_documents.extend(documents)
+            batch_metadatas.extend(metadatas)
+            section_counts.setdefault(collection_name, []).append((label, len(documents)))
+        
+        # The collections are independent, so upload them concurrently over the shared session
+        pending = [(name, batch) for name, batch in batches.items() if batch[0]]
+        with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as executor:
+            results = list(executor.map(
+                lambda item: self.add_in_batches(item[0], *item[1]),
+                pending
+            ))
         
-        self.seed_task_initiation_helpers(guide)
+        print()
+        for (collection_name, _), added in zip(pending, results):
+            for label, count in section_counts[collection_name]:
+                if added:
+                    print(f"   ✅ Added {count} {label}")
+                else:
+                    print(f"   ❌ Failed to add {label}")
         
         print()
         print("🎉 Conversation management guide seeded successfully!")
@@ -308,8 +340,8 @@ class ConversationGuideSeeder:
         return True
 
 def main():
-    seeder = ConversationGuideSeeder()
-    seeder.seed_all()
+    with ConversationGuideSeeder() as seeder:
+        seeder.seed_all()
 
 if __name__ == "__main__":
     main()
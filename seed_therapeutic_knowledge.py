@@ -5,27 +5,51 @@ Seeds the vector database with curated therapeutic responses and interventions
 Only adds new content, preserves existing data
 """
 
-import requests
-import json
-import time
-from typing import Dict, List, Any
+from http_session import HEALTH_TIMEOUT, JSON_HEADERS, REQUEST_TIMEOUT, SEED_BATCH_SIZE, SEED_RETRY
+from http_session import PooledSessionClient, content_digest, make_session
+import orjson
+from typing import Dict, List, Any, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
-class TherapeuticSeeder:
+def legacy_content_id(doc: str) -> str:
+    """Identifier used by older seeded content records (first 50 characters)"""
+    return f"{doc[:50]}..." if len(doc) > 50 else doc
+
+@lru_cache(maxsize=1)
+def _load_knowledge(path_str: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Parse the curated knowledge file once, on first use"""
+    return orjson.loads(Path(path_str).read_bytes())
+
+@lru_cache(maxsize=8)
+def _load_seeded(path_str: str, mtime_ns: int) -> Dict[str, List[str]]:
+    """Parse a seeded content record once per (path, mtime); callers must not mutate the result"""
+    return orjson.loads(Path(path_str).read_bytes())
+
+class TherapeuticSeeder(PooledSessionClient):
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
+        self.session = make_session(SEED_RETRY)
+        self.knowledge_file = Path(__file__).parent / "therapeutic_knowledge.json"
         self.seeded_content_file = Path(__file__).parent / "retriever" / "data" / "seeded_content.json"
         self.seeded_content_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Load already seeded content
         self.seeded_content = self.load_seeded_content()
     
-    def load_seeded_content(self) -> Dict[str, List[str]]:
+    def load_knowledge_section(self, collection_name: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Load the curated documents and metadata for one collection"""
+        entries = _load_knowledge(str(self.knowledge_file))[collection_name]
+        return [entry["text"] for entry in entries], [entry["meta"] for entry in entries]
+    
+    def load_seeded_content(self) -> Dict[str, Set[str]]:
         """Load record of already seeded content"""
         try:
             if self.seeded_content_file.exists():
-                with open(self.seeded_content_file, 'r') as f:
-                    return json.load(f)
+                seeded = _load_seeded(str(self.seeded_content_file), self.seeded_content_file.stat().st_mtime_ns)
+                # Fresh sets, so updates never leak back into the cached record
+                return {name: set(ids) for name, ids in seeded.items()}
         except Exception as e:
             print(f"Warning: Could not load seeded content record: {e}")
         return {}
@@ -33,200 +57,104 @@ class TherapeuticSeeder:
     def save_seeded_content(self):
         """Save record of seeded content"""
         try:
-            with open(self.seeded_content_file, 'w') as f:
-                json.dump(self.seeded_content, f, indent=2)
+            record = {name: sorted(ids) for name, ids in self.seeded_content.items()}
+            self.seeded_content_file.write_bytes(orjson.dumps(record, option=orjson.OPT_INDENT_2))
         except Exception as e:
             print(f"Warning: Could not save seeded content record: {e}")
     
     def check_service_health(self) -> bool:
         """Check if the vector service is running"""
         try:
-            response = requests.get(f"{self.base_url}/health")
+            # HEAD skips the body; the status code is all that matters here
+            response = self.session.head(f"{self.base_url}/health", timeout=HEALTH_TIMEOUT)
             return response.status_code == 200
         except:
             return False
     
-    def get_collection_count(self, collection_name: str) -> int:
-        """Get the current document count for a collection"""
+    def get_collection_counts(self) -> Dict[str, int]:
+        """Get the current document count of every collection in one request"""
         try:
-            response = requests.get(f"{self.base_url}/collections")
+            response = self.session.get(f"{self.base_url}/collections", timeout=REQUEST_TIMEOUT)
             if response.status_code == 200:
-                collections = response.json().get("collections", [])
-                for coll in collections:
-                    if coll["name"] == collection_name:
-                        return coll["count"]
+                return {coll["name"]: coll["count"] for coll in response.json().get("collections", [])}
         except:
             pass
-        return 0
+        return {}
     
     def add_unique_content(self, collection_name: str, documents: List[str], metadatas: List[Dict[str, Any]]) -> int:
         """Add content only if it hasn't been seeded before"""
-        seeded_for_collection = self.seeded_content.get(collection_name, [])
+        seeded_for_collection = self.seeded_content.setdefault(collection_name, set())
         
         # Filter out already seeded content
         new_documents = []
         new_metadatas = []
-        
-        for i, doc in enumerate(documents):
-            # Create a simple hash/identifier for the document
-            doc_id = f"{doc[:50]}..." if len(doc) > 50 else doc
-            
-            if doc_id not in seeded_for_collection:
-                new_documents.append(doc)
-                new_metadatas.append(metadatas[i])
-                seeded_for_collection.append(doc_id)
+        new_ids = []
+        
+        for doc, metadata in zip(documents, metadatas):
+            doc_id = content_digest(doc)
+            if doc_id in seeded_for_collection:
+                continue
+            legacy_id = legacy_content_id(doc)
+            if legacy_id in seeded_for_collection:
+                # Seeded under the old prefix scheme; switch the record over to the digest
+                seeded_for_collection.discard(legacy_id)
+                seeded_for_collection.add(doc_id)
+                continue
+            new_documents.append(doc)
+            new_metadatas.append(metadata)
+            new_ids.append(doc_id)
         
         if not new_documents:
             print(f"   ⏭️  All content already exists in {collection_name}")
             return 0
         
-        # Add new content
-        try:
-            response = requests.post(f"{self.base_url}/add_context", json={
-                "documents": new_documents,
-                "metadatas": new_metadatas,
-                "collection_name": collection_name
-            })
-            
-            if response.status_code == 200:
-                # Update seeded content record
-                self.seeded_content[collection_name] = seeded_for_collection
-                self.save_seeded_content()
-                return len(new_documents)
-            else:
-                print(f"   ❌ Failed to add content: {response.text}")
-                return 0
-        except Exception as e:
-            print(f"   ❌ Error adding content: {e}")
-            return 0
+        # Add new content in batches sized for Chroma's sweet spot
+        added = 0
+        for start in range(0, len(new_documents), SEED_BATCH_SIZE):
+            batch_ids = new_ids[start:start + SEED_BATCH_SIZE]
+            try:
+                body = orjson.dumps({
+                    "documents": new_documents[start:start + SEED_BATCH_SIZE],
+                    "metadatas": new_metadatas[start:start + SEED_BATCH_SIZE],
+                    "ids": batch_ids,
+                    "collection_name": collection_name
+                })
+                response = self.session.post(f"{self.base_url}/add_context", data=body,
+                                             headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
+                
+                if response.status_code != 200:
+                    print(f"   ❌ Failed to add content: {response.text}")
+                    break
+            except Exception as e:
+                print(f"   ❌ Error adding content: {e}")
+                break
+            # Update seeded content record; seed_all writes it to disk once at the end
+            seeded_for_collection.update(batch_ids)
+            added += len(batch_ids)
+        return added
     
     def seed_therapeutic_responses(self):
         """Seed ADHD-specific therapeutic responses"""
         print("🧠 Seeding therapeutic responses...")
         
-        responses = [
-            "ADHD brains feel emotions more intensely - what you're experiencing is real and valid.",
-            "Your ADHD brain is working extra hard right now. You're doing the best you can.",
-            "Emotional overwhelm with ADHD is exhausting. You're showing real strength by reaching out.",
-            "ADHD makes everything feel more urgent and intense. Let's slow this down together.",
-            "Your ADHD brain processes things differently, and that includes stress. This will pass.",
-            "Executive dysfunction is real with ADHD. It's not laziness - your brain works differently.",
-            "ADHD hyperfocus can be both a gift and a challenge. You're not broken, you're different.",
-            "Rejection sensitivity with ADHD can make criticism feel devastating. Your feelings are valid.",
-            "ADHD time blindness makes planning hard. Let's break this into tiny, manageable steps.",
-            "Your ADHD brain needs more dopamine to feel motivated. This isn't a character flaw.",
-            "Emotional dysregulation with ADHD means big feelings. You're not too sensitive.",
-            "ADHD working memory challenges make following instructions hard. Let's simplify this.",
-            "Your ADHD brain thrives on novelty and stimulation. Boredom can feel physically painful.",
-            "Masking ADHD symptoms is exhausting. You deserve understanding and accommodation.",
-            "ADHD paralysis when overwhelmed is real. Let's find just one small thing you can do."
-        ]
-        
-        metadatas = [
-            {"type": "validation", "topic": "emotional_intensity", "crisis_level": "mild"},
-            {"type": "validation", "topic": "effort_recognition", "crisis_level": "moderate"}, 
-            {"type": "validation", "topic": "overwhelm", "crisis_level": "moderate"},
-            {"type": "grounding", "topic": "urgency", "crisis_level": "severe"},
-            {"type": "reassurance", "topic": "difference", "crisis_level": "mild"},
-            {"type": "education", "topic": "executive_dysfunction", "crisis_level": "mild"},
-            {"type": "reframe", "topic": "hyperfocus", "crisis_level": "none"},
-            {"type": "validation", "topic": "rejection_sensitivity", "crisis_level": "moderate"},
-            {"type": "education", "topic": "time_blindness", "crisis_level": "mild"},
-            {"type": "education", "topic": "motivation", "crisis_level": "mild"},
-            {"type": "validation", "topic": "emotional_dysregulation", "crisis_level": "moderate"},
-            {"type": "education", "topic": "working_memory", "crisis_level": "mild"},
-            {"type": "education", "topic": "stimulation_needs", "crisis_level": "none"},
-            {"type": "validation", "topic": "masking", "crisis_level": "moderate"},
-            {"type": "grounding", "topic": "paralysis", "crisis_level": "severe"}
-        ]
-        
-        added = self.add_unique_content("therapeutic_responses", responses, metadatas)
+        documents, metadatas = self.load_knowledge_section("therapeutic_responses")
+        added = self.add_unique_content("therapeutic_responses", documents, metadatas)
         print(f"   ✅ Added {added} new therapeutic responses")
     
     def seed_intervention_library(self):
         """Seed crisis intervention techniques"""
         print("🆘 Seeding intervention library...")
         
-        interventions = [
-            "Let's start with just one deep breath. In through your nose for 4 counts, hold for 4, out through your mouth for 6.",
-            "Right now, name 5 things you can see, 4 things you can touch, 3 things you can hear, 2 things you can smell, 1 thing you can taste.",
-            "Your safety is the most important thing right now. Are you in a safe space? Can you move to one if needed?",
-            "This intense feeling will pass. ADHD emotions are like waves - they peak and then they recede. You've gotten through this before.",
-            "Let's use the TIPP technique: splash cold water on your face, do 10 jumping jacks, breathe slowly, and tense then relax your muscles.",
-            "Try the STOP technique: Stop what you're doing, Take a breath, Observe your thoughts and feelings, Proceed mindfully.",
-            "Use bilateral stimulation: tap your knees alternating left-right, or cross your arms and pat your shoulders.",
-            "Ground yourself: press your feet firmly into the floor, feel the weight of your body in the chair.",
-            "Name your emotions: 'I'm feeling overwhelming anxiety right now' - labeling helps your brain process.",
-            "Use the 4-7-8 breath: breathe in for 4, hold for 7, exhale slowly for 8 counts.",
-            "Try progressive muscle relaxation: tense your shoulders for 5 seconds, then release and notice the contrast.",
-            "Use the RAIN technique: Recognize what's happening, Allow the experience, Investigate with kindness, Natural awareness.",
-            "Practice radical acceptance: 'This is what I'm feeling right now, and that's okay.'",
-            "Use your senses: hold an ice cube, smell something strong, listen to calming music.",
-            "Create safety: remind yourself where you are, that you're safe, and this will pass."
-        ]
-        
-        metadatas = [
-            {"technique": "breathing", "crisis_level": "moderate", "duration": "30 seconds", "type": "physiological"},
-            {"technique": "grounding", "crisis_level": "moderate", "duration": "2 minutes", "type": "sensory"},
-            {"technique": "safety", "crisis_level": "severe", "duration": "1 minute", "type": "assessment"},
-            {"technique": "validation", "crisis_level": "moderate", "duration": "30 seconds", "type": "cognitive"},
-            {"technique": "DBT_TIPP", "crisis_level": "severe", "duration": "5 minutes", "type": "physiological"},
-            {"technique": "mindfulness", "crisis_level": "mild", "duration": "1 minute", "type": "cognitive"},
-            {"technique": "bilateral_stimulation", "crisis_level": "moderate", "duration": "1 minute", "type": "physiological"},
-            {"technique": "grounding", "crisis_level": "mild", "duration": "30 seconds", "type": "physical"},
-            {"technique": "emotion_labeling", "crisis_level": "moderate", "duration": "30 seconds", "type": "cognitive"},
-            {"technique": "breathing", "crisis_level": "moderate", "duration": "1 minute", "type": "physiological"},
-            {"technique": "progressive_relaxation", "crisis_level": "mild", "duration": "2 minutes", "type": "physiological"},
-            {"technique": "RAIN", "crisis_level": "moderate", "duration": "3 minutes", "type": "mindfulness"},
-            {"technique": "acceptance", "crisis_level": "moderate", "duration": "30 seconds", "type": "cognitive"},
-            {"technique": "sensory", "crisis_level": "severe", "duration": "1 minute", "type": "sensory"},
-            {"technique": "safety_reminder", "crisis_level": "severe", "duration": "30 seconds", "type": "cognitive"}
-        ]
-        
-        added = self.add_unique_content("intervention_library", interventions, metadatas)
+        documents, metadatas = self.load_knowledge_section("intervention_library")
+        added = self.add_unique_content("intervention_library", documents, metadatas)
         print(f"   ✅ Added {added} new intervention techniques")
     
     def seed_user_patterns(self):
         """Seed user pattern recognition data"""
         print("👤 Seeding user pattern library...")
         
-        patterns = [
-            "User shows attention fade pattern: short responses, 'idk', 'ok', 'whatever' - needs micro-breaks and simplified guidance.",
-            "User exhibits ADHD emotional dysregulation: intense emotions, catastrophic thinking - needs validation and grounding first.",
-            "User demonstrates hyperfocus tendency: very long messages, detailed explanations - can handle more complex interventions.",
-            "User shows executive dysfunction: difficulty with decisions, feeling overwhelmed by choices - needs structured options.",
-            "User displays rejection sensitivity: takes feedback personally, needs extra validation and gentle approach.",
-            "User exhibits time blindness: underestimates task duration, struggles with transitions - needs explicit time awareness.",
-            "User shows working memory challenges: loses track of conversation, needs frequent summaries and simple instructions.",
-            "User demonstrates perfectionism paralysis: afraid to start tasks, overwhelmed by standards - needs permission to be imperfect.",
-            "User exhibits emotional overwhelm: big feelings about small things - needs validation that emotions are proportional to ADHD brain.",
-            "User shows masking exhaustion: appears fine but struggling internally - needs permission to unmask and be authentic.",
-            "User demonstrates dopamine-seeking: difficulty with boring tasks, needs novelty - needs gamification and rewards.",
-            "User exhibits social anxiety: fears judgment about ADHD traits - needs reassurance about neurodivergent authenticity.",
-            "User shows cognitive overload: too many thoughts at once - needs brain dump and prioritization techniques.",
-            "User demonstrates imposter syndrome: feels like fraud despite success - needs validation of ADHD strengths.",
-            "User exhibits crisis escalation: moves quickly from mild to severe distress - needs early intervention recognition."
-        ]
-        
-        metadatas = [
-            {"pattern": "attention_fade", "intervention": "micro_breaks", "priority": "high"},
-            {"pattern": "emotional_dysregulation", "intervention": "validation_first", "priority": "high"},
-            {"pattern": "hyperfocus", "intervention": "complex_ok", "priority": "medium"},
-            {"pattern": "executive_dysfunction", "intervention": "structure_needed", "priority": "high"},
-            {"pattern": "rejection_sensitivity", "intervention": "extra_validation", "priority": "high"},
-            {"pattern": "time_blindness", "intervention": "time_awareness", "priority": "medium"},
-            {"pattern": "working_memory", "intervention": "simplify_repeat", "priority": "high"},
-            {"pattern": "perfectionism", "intervention": "permission_imperfect", "priority": "medium"},
-            {"pattern": "emotional_overwhelm", "intervention": "validate_proportionality", "priority": "high"},
-            {"pattern": "masking_exhaustion", "intervention": "permission_authentic", "priority": "high"},
-            {"pattern": "dopamine_seeking", "intervention": "gamification", "priority": "medium"},
-            {"pattern": "social_anxiety", "intervention": "neurodivergent_acceptance", "priority": "medium"},
-            {"pattern": "cognitive_overload", "intervention": "brain_dump", "priority": "high"},
-            {"pattern": "imposter_syndrome", "intervention": "strength_validation", "priority": "medium"},
-            {"pattern": "crisis_escalation", "intervention": "early_intervention", "priority": "critical"}
-        ]
-        
-        added = self.add_unique_content("user_patterns", patterns, metadatas)
+        documents, metadatas = self.load_knowledge_section("user_patterns")
+        added = self.add_unique_content("user_patterns", documents, metadatas)
         print(f"   ✅ Added {added} new user patterns")
     
     def seed_all(self):
@@ -241,28 +169,30 @@ class TherapeuticSeeder:
         
         # Show current state
         print("📊 Current collection sizes:")
+        counts = self.get_collection_counts()
         for collection in ["therapeutic_responses", "intervention_library", "user_patterns"]:
-            count = self.get_collection_count(collection)
-            print(f"   • {collection}: {count} documents")
+            print(f"   • {collection}: {counts.get(collection, 0)} documents")
         print()
         
-        # Seed each collection
-        self.seed_therapeutic_responses()
-        self.seed_intervention_library()
-        self.seed_user_patterns()
+        # Each seed targets its own collection, so run them concurrently over the shared session
+        seeds = [self.seed_therapeutic_responses, self.seed_intervention_library, self.seed_user_patterns]
+        with ThreadPoolExecutor(max_workers=len(seeds)) as executor:
+            for future in [executor.submit(seed) for seed in seeds]:
+                future.result()
+        self.save_seeded_content()
         
         print("\n📊 Final collection sizes:")
+        counts = self.get_collection_counts()
         for collection in ["therapeutic_responses", "intervention_library", "user_patterns"]:
-            count = self.get_collection_count(collection)
-            print(f"   • {collection}: {count} documents")
+            print(f"   • {collection}: {counts.get(collection, 0)} documents")
         
         print("\n🎉 Therapeutic knowledge seeding complete!")
         print("💾 All content is persistently stored and will survive service restarts.")
         print("🔄 Run this script again anytime to add new therapeutic content.")
 
 def main():
-    seeder = TherapeuticSeeder()
-    seeder.seed_all()
+    with TherapeuticSeeder() as seeder:
+        seeder.seed_all()
 
 if __name__ == "__main__":
     main()
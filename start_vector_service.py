@@ -5,14 +5,58 @@ Starts the FastAPI service and optionally seeds with initial therapeutic data
 """
 
 import asyncio
+import hashlib
+import io
 import json
+import re
+import shutil
+import signal
+import socket
 import subprocess
 import sys
+import threading
 import time
+import venv
+from contextlib import redirect_stdout
 from pathlib import Path
-import requests
 import os
 
+# Loopback address of the service; uvicorn itself listens on all interfaces
+SERVICE_ADDRESS = ("127.0.0.1", 8000)
+
+def port_available(port=SERVICE_ADDRESS[1]):
+    """Return False if something is already listening on the service port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        # Mirror uvicorn's own bind: reuse TIME_WAIT ports on POSIX, but never on Windows,
+        # where SO_REUSEADDR would let us bind over a live listener
+        if os.name != 'nt':
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            probe.bind(("0.0.0.0", port))
+        except OSError:
+            return False
+    return True
+
+# Seconds to let uvicorn shut down gracefully before killing its process group
+STOP_TIMEOUT = 5
+
+# Interpreter location inside the venv, resolved once for this platform
+VENV_PYTHON = Path("Scripts", "python.exe") if os.name == 'nt' else Path("bin", "python")
+
+# Hash of the last successfully installed requirements.txt, kept inside the venv
+REQS_MARKER = ".reqs.sha256"
+
+def requirements_changed(retriever_dir):
+    """Return the requirements hash if it differs from the installed marker, else None"""
+    digest = hashlib.sha256((retriever_dir / "requirements.txt").read_bytes()).hexdigest()
+    marker = retriever_dir / "venv" / REQS_MARKER
+    try:
+        if marker.read_text().strip() == digest:
+            return None
+    except OSError:
+        pass
+    return digest
+
 def start_service():
     """Start the FastAPI retrieval service"""
     print("🚀 Starting Vector Retrieval Service...")
@@ -23,69 +67,174 @@ def start_service():
     # Install dependencies if needed
     if not (retriever_dir / "venv").exists():
         print("📦 Setting up virtual environment...")
-        subprocess.run([sys.executable, "-m", "venv", "venv"], cwd=retriever_dir)
+        # Build in-process; symlinking the interpreter avoids copying it on POSIX
+        venv.EnvBuilder(symlinks=(os.name != 'nt'), with_pip=True).create(retriever_dir / "venv")
         
     # Activate venv and install requirements
-    if os.name == 'nt':  # Windows
-        pip_path = retriever_dir / "venv" / "Scripts" / "pip"
-        python_path = retriever_dir / "venv" / "Scripts" / "python"
-    else:  # Unix
-        pip_path = retriever_dir / "venv" / "bin" / "pip"
-        python_path = retriever_dir / "venv" / "bin" / "python"
+    python_path = retriever_dir / "venv" / VENV_PYTHON
     
-    print("📦 Installing dependencies...")
-    subprocess.run([str(pip_path), "install", "-r", "requirements.txt"], cwd=retriever_dir)
+    # Skip pip entirely when requirements.txt is unchanged since the last install
+    reqs_digest = requirements_changed(retriever_dir)
+    if reqs_digest is None:
+        print("📦 Dependencies up to date")
+    else:
+        print("📦 Installing dependencies...")
+        # Our fds are non-inheritable (PEP 446), so close_fds=False just skips the fd sweep.
+        # uv resolves and installs far faster than pip when it is on PATH; neither compiles .pyc
+        uv_path = shutil.which("uv")
+        if uv_path:
+            install_cmd = [uv_path, "pip", "install", "--python", str(python_path), "-r", "requirements.txt", "-q"]
+            install_env = None
+        else:
+            # Prefer wheels and skip .pyc compilation to cut install wall-time
+            install_cmd = [
+                str(python_path), "-m", "pip", "install", "-r", "requirements.txt",
+                "--prefer-binary", "--no-compile",
+                "--disable-pip-version-check", "--no-input", "-q", "--require-virtualenv"
+            ]
+            install_env = dict(os.environ, PIP_NO_PYTHON_VERSION_WARNING="1", PYTHONDONTWRITEBYTECODE="1")
+        result = subprocess.run(install_cmd, cwd=retriever_dir, env=install_env, close_fds=False)
+        if result.returncode == 0:
+            # The installer skipped .pyc generation; compile the app and its deps once, on every CPU
+            subprocess.run([str(python_path), "-m", "compileall", "-q", "-j", "0", str(retriever_dir)], close_fds=False)
+            (retriever_dir / "venv" / REQS_MARKER).write_text(reqs_digest)
     
     # Start the service
     print("🌐 Starting FastAPI server on http://localhost:8000")
-    process = subprocess.Popen([
-        str(python_path), "-m", "uvicorn", "app:app", 
-        "--host", "0.0.0.0", "--port", "8000", "--reload"
-    ], cwd=retriever_dir)
+    uvicorn_args = [
+        str(python_path), "-m", "uvicorn", "app:app",
+        "--host", "0.0.0.0", "--port", str(SERVICE_ADDRESS[1]), "--no-access-log"
+    ]
+    # Both ship with uvicorn[standard]; pin them so a missing one fails loudly instead of
+    # silently falling back. uvloop is not installed on Windows.
+    uvicorn_args += ["--http", "httptools"]
+    if os.name != 'nt':
+        uvicorn_args += ["--loop", "uvloop"]
+    # The file watcher doubles boot cost; only enable it when explicitly asked
+    if os.environ.get("DEV_RELOAD") == "1":
+        uvicorn_args.append("--reload")
+    # Own process group so shutdown reaches the reloader and its worker in one signal
+    if os.name == 'nt':
+        group_kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group_kwargs = {"start_new_session": True}
+    # Line-buffered stderr so the readiness watcher sees uvicorn's log as it is written
+    process = subprocess.Popen(
+        uvicorn_args, cwd=retriever_dir, stderr=subprocess.PIPE, bufsize=1, text=True, **group_kwargs
+    )
     
     return process
 
-def wait_for_service(max_attempts=30):
+def stop_service(process, timeout=STOP_TIMEOUT):
+    """Signal the service's whole process group, escalating to a kill on timeout"""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if os.name == 'nt':
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+# uvicorn logs this to stderr once the app's startup hooks have finished
+STARTUP_MARKER = "Application startup complete"
+STARTUP_TIMEOUT = 30
+PROGRESS_INTERVAL = 5
+
+# uvicorn binds only after that log line, so confirm with a bare TCP connect
+CONNECT_TIMEOUT = 0.1
+CONNECT_RETRY_DELAY = 0.025
+BIND_TIMEOUT = 5
+
+def port_accepting(address=SERVICE_ADDRESS, timeout=BIND_TIMEOUT):
+    """Return True once a TCP connect to the service address succeeds"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(address, timeout=CONNECT_TIMEOUT).close()
+            return True
+        except OSError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(CONNECT_RETRY_DELAY)
+
+def watch_startup(process):
+    """Tee uvicorn's stderr; return (started, settled) events for the readiness wait"""
+    started = threading.Event()
+    settled = threading.Event()
+    
+    def pump():
+        for line in process.stderr:
+            sys.stderr.write(line)
+            if not started.is_set() and STARTUP_MARKER in line:
+                started.set()
+                settled.set()
+        # EOF means uvicorn exited; wake the waiter instead of letting it time out
+        settled.set()
+    
+    threading.Thread(target=pump, daemon=True).start()
+    return started, settled
+
+def wait_for_service(startup, timeout=STARTUP_TIMEOUT):
     """Wait for the service to be ready"""
     print("⏳ Waiting for service to be ready...")
+    started, settled = startup
     
-    for attempt in range(max_attempts):
-        try:
-            response = requests.get("http://localhost:8000/health", timeout=2)
-            if response.status_code == 200:
-                print("✅ Service is ready!")
-                return True
-        except requests.exceptions.RequestException:
-            pass
-        
-        time.sleep(1)
-        print(f"   Attempt {attempt + 1}/{max_attempts}...")
+    # Block on the watcher; wake only to report progress
+    waited = 0
+    while waited < timeout and not settled.wait(min(PROGRESS_INTERVAL, timeout - waited)):
+        waited += PROGRESS_INTERVAL
+        print(f"   Still waiting ({min(waited, timeout)}s/{timeout}s)...")
+    
+    if started.is_set() and port_accepting():
+        print("✅ Service is ready!")
+        return True
     
     print("❌ Service failed to start")
     return False
 
+# Seeder output lines worth echoing in the startup summary
+SEED_SUMMARY_PATTERN = re.compile(r"(?:✅ Added|📊|🎉)")
+
+class SummaryFilter(io.TextIOBase):
+    """stdout stand-in that echoes seeder summary lines as soon as they are complete"""
+    
+    def __init__(self, out):
+        self.out = out
+        self.pending = ""
+        # The seeder prints from one thread per collection
+        self.lock = threading.Lock()
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        with self.lock:
+            *lines, self.pending = (self.pending + text).split("\n")
+            for line in lines:
+                if SEED_SUMMARY_PATTERN.search(line):
+                    self.out.write(f"   {line}\n")
+        return len(text)
+
 def seed_therapeutic_data():
     """Use the persistent therapeutic seeding system"""
     print("🌱 Seeding therapeutic knowledge with persistent system...")
     
     try:
-        # Run the dedicated seeding script
-        import subprocess
-        result = subprocess.run([sys.executable, "seed_therapeutic_knowledge.py"], 
-                              capture_output=True, text=True, cwd=Path(__file__).parent)
+        # Run the seeder in-process, streaming only its summary lines instead of buffering the report
+        import seed_therapeutic_knowledge
+        with redirect_stdout(SummaryFilter(sys.stdout)):
+            seed_therapeutic_knowledge.main()
         
-        if result.returncode == 0:
-            print("✅ Therapeutic knowledge seeded successfully")
-            # Print key parts of the output
-            output_lines = result.stdout.split('\n')
-            for line in output_lines:
-                if '✅ Added' in line or '📊' in line or '🎉' in line:
-                    print(f"   {line}")
-        else:
-            print(f"⚠️  Seeding completed with warnings:")
-            print(result.stdout)
-            if result.stderr:
-                print("Errors:", result.stderr)
+        print("✅ Therapeutic knowledge seeded successfully")
                 
     except Exception as e:
         print(f"❌ Error running therapeutic seeding: {e}")
@@ -96,12 +245,18 @@ def main():
     print("🎯 ADHD Support Vector Retrieval Service Initializer")
     print("=" * 50)
     
+    # uvicorn would exit straight away on a taken port; say so before installing anything
+    if not port_available():
+        print(f"❌ Port {SERVICE_ADDRESS[1]} is already in use; stop the other process and try again")
+        sys.exit(1)
+    
     # Start the service
     process = start_service()
+    startup = watch_startup(process)
     
     try:
         # Wait for service to be ready
-        if wait_for_service():
+        if wait_for_service(startup):
             # Seed with initial data
             seed_therapeutic_data()
             
@@ -116,12 +271,11 @@ def main():
             process.wait()
         else:
             print("❌ Failed to start service")
-            process.terminate()
+            stop_service(process)
             
     except KeyboardInterrupt:
         print("\n🛑 Shutting down service...")
-        process.terminate()
-        process.wait()
+        stop_service(process)
         print("✅ Service stopped")
 
 if __name__ == "__main__":